@@ -0,0 +1,45 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.health import readiness_probe
+from app.core.metrics import metrics
+
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness():
+    result = await readiness_probe.check()
+    status_code = (
+        status.HTTP_200_OK
+        if result["status"] == "ok"
+        else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    return JSONResponse(status_code=status_code, content=result)
+
+
+def metrics_token(authorization: str | None = Header(None)):
+    """Metrics expose routes and pool internals: disabled unless `METRICS_TOKEN` is set."""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    expected = f"Bearer {settings.metrics_token}"
+    if authorization is None or not secrets.compare_digest(authorization, expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(metrics_token)])
+async def get_metrics():
+    return metrics.snapshot()
@@ -1,3 +1,5 @@
+from app.api.v1.routers.batch import router as batch_router
+from app.api.v1.routers.memory import router as memory_router
 from app.api.v1.routers.oauth import router as oauth_router
 from app.api.v1.routers.user_router import router as user_router
 from app.api.v1.routers.todo import todo_router
@@ -6,5 +8,7 @@ from app.api.v1.routers.todo import todo_router
 routers_v1 = [
     oauth_router,
     user_router,
-    todo_router
+    todo_router,
+    batch_router,
+    memory_router,
 ]
\ No newline at end of file
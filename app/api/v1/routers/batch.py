@@ -0,0 +1,6 @@
+from app.api.v1.routers.todo import todo_routes
+from app.core.batch import BatchRouter
+from app.users.auth_config import current_active_user
+
+
+router = BatchRouter(routers=[todo_routes], current_user=current_active_user).router
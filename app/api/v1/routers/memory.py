@@ -0,0 +1,67 @@
+import asyncio
+from typing import Any
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.memory import GroupBy, memory_profiler
+from app.users.auth_config import current_superuser
+
+
+router = APIRouter(
+    prefix="/admin/memory",
+    tags=["admin"],
+    dependencies=[Depends(current_superuser)],
+)
+
+# Snapshots and object scans walk every traced block or object; they run in a
+# worker thread so the loop keeps serving other requests meanwhile. So do the
+# cheap calls: they wait for the profiler lock, which a report may hold for seconds.
+
+
+@router.post("/start")
+async def start_tracing(frames: int | None = Query(None, ge=1, le=100)) -> dict[str, Any]:
+    return await asyncio.to_thread(memory_profiler.start, frames)
+
+
+@router.post("/stop")
+async def stop_tracing() -> dict[str, Any]:
+    return await asyncio.to_thread(memory_profiler.stop)
+
+
+@router.get("/status")
+async def tracing_status() -> dict[str, Any]:
+    return await asyncio.to_thread(memory_profiler.status)
+
+
+@router.post("/snapshots")
+async def take_snapshot() -> dict[str, Any]:
+    return await asyncio.to_thread(memory_profiler.take_snapshot)
+
+
+@router.get("/top")
+async def top_allocations(
+    snapshot: str | None = None,
+    group_by: GroupBy = "module",
+    limit: int = Query(20, ge=1, le=500),
+) -> list[dict[str, Any]]:
+    return await asyncio.to_thread(memory_profiler.top, snapshot, group_by, limit)
+
+
+@router.get("/diff")
+async def allocation_diff(
+    base: str,
+    target: str | None = None,
+    group_by: GroupBy = "module",
+    limit: int = Query(20, ge=1, le=500),
+) -> list[dict[str, Any]]:
+    return await asyncio.to_thread(memory_profiler.diff, base, target, group_by, limit)
+
+
+@router.get("/gc")
+async def gc_stats() -> dict[str, Any]:
+    return await asyncio.to_thread(memory_profiler.gc_stats)
+
+
+@router.get("/objects")
+async def orm_objects() -> dict[str, Any]:
+    return await asyncio.to_thread(memory_profiler.orm_objects)
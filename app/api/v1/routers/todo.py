@@ -1,16 +1,56 @@
+from fastapi import Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.deadline import request_deadline
+from app.core.listing import Filter, Listing
 from app.core.router import BaseRouterWithUser
-from app.todo.service import get_todo_service
-from app.todo.schemas import TodoRead, TodoCreate, TodoUpdate
+from app.todo.models import Todo
+from app.todo.service import TodoService, get_todo_service, todo_change_feed
+from app.todo.schemas import TodoChanges, TodoRead, TodoCreate, TodoUpdate
 from app.users.auth_config import current_active_user
+from app.users.models import User
 
 
-todo_router = BaseRouterWithUser(
+todo_routes = BaseRouterWithUser(
     model=TodoRead,
     model_create=TodoCreate,
     model_update=TodoUpdate,
     service_dependency=get_todo_service,
     prefix="/todos",
     tags=["todos"],
-    current_user=current_active_user
-).router
+    current_user=current_active_user,
+    listing=Listing(
+        Todo,
+        filters=[
+            Filter("title_prefix", "title", "prefix"),
+            Filter("id_gt", "id", "gt"),
+            Filter("id_lt", "id", "lt"),
+        ],
+        sort=["id", "title"],
+    ),
+)
+todo_router = todo_routes.router
+
+
+@todo_router.get("/stream")
+async def stream_todo_changes(request: Request, user: User = Depends(current_active_user)):
+    """Server-sent events with the ids of the current user's todos that changed."""
+    subscription = await todo_change_feed.subscribe(str(user.id))
+    return StreamingResponse(
+        todo_change_feed.stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
+@todo_router.get(
+    "/changes", response_model=TodoChanges, dependencies=[Depends(request_deadline())]
+)
+async def get_todo_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=1000),
+    service: TodoService = Depends(get_todo_service),
+    user: User = Depends(current_active_user),
+):
+    """Delta sync: todos changed and ids deleted after version `since`."""
+    return await service.get_changes(user, since, limit)
@@ -1,22 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi_users.exceptions import InvalidVerifyToken, UserAlreadyVerified
 
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter, form_field, json_field
 from app.users.auth_config import fastapi_users, auth_backend, current_active_user
 from app.users.manager import UserManager, get_user_manager
 from app.users.models import User
 from app.users.schemas import UserRead, UserCreate, UserUpdate, VerifyEmailRequest
 
 
+def auth_rate_limits(scope: str, user_key_func) -> list:
+    """Per-IP and per-account limits for endpoints that hash passwords or send e-mails."""
+    return [
+        Depends(RateLimiter(f"{scope}:ip", settings.rate_limit_ip_capacity)),
+        Depends(
+            RateLimiter(
+                f"{scope}:user",
+                settings.rate_limit_user_capacity,
+                key_func=user_key_func,
+            )
+        ),
+    ]
+
+
+def split_routes(source: APIRouter, paths: set[str]) -> tuple[APIRouter, APIRouter]:
+    """Splits a router into the routes at `paths` and the rest, so limits can be attached to some routes only."""
+    selected, rest = APIRouter(), APIRouter()
+    selected.routes = [route for route in source.routes if route.path in paths]
+    rest.routes = [route for route in source.routes if route.path not in paths]
+    return selected, rest
+
+
+verification_ip_limiter = RateLimiter("verification:ip", settings.rate_limit_ip_capacity)
+verification_user_limiter = RateLimiter("verification:user", settings.rate_limit_user_capacity)
+
+
+async def verification_rate_limit(
+    request: Request, user: User = Depends(current_active_user)
+):
+    await verification_ip_limiter(request)
+    await verification_user_limiter.hit(str(user.id))
+
+
 router = APIRouter()
 
+# Logout stays unlimited: a client that exhausted the login limit must still be able to log out.
+login_router, logout_router = split_routes(fastapi_users.get_auth_router(auth_backend), {"/login"})
+
 router.include_router(
-    fastapi_users.get_auth_router(auth_backend), prefix="/auth/jwt", tags=["auth"]
+    login_router,
+    prefix="/auth/jwt",
+    tags=["auth"],
+    dependencies=auth_rate_limits("login", form_field("username")),
 )
 
+router.include_router(logout_router, prefix="/auth/jwt", tags=["auth"])
+
 router.include_router(
     fastapi_users.get_register_router(UserRead, UserCreate),
     prefix="/auth",
     tags=["auth"],
+    dependencies=auth_rate_limits("register", json_field("email")),
 )
 
 router.include_router(
@@ -29,6 +73,7 @@ router.include_router(
     fastapi_users.get_reset_password_router(),
     prefix="/auth",
     tags=["auth"],
+    dependencies=auth_rate_limits("reset-password", json_field("email")),
 )
 
 
@@ -45,7 +90,9 @@ async def verify_email(
         raise HTTPException(status_code=400, detail="Пользователь уже верифицирован")
 
 
-@router.post("/auth/request-verification")
+@router.post(
+    "/auth/request-verification", dependencies=[Depends(verification_rate_limit)]
+)
 async def request_verification(
     user: User = Depends(current_active_user),
     user_manager: UserManager = Depends(get_user_manager),
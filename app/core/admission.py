@@ -0,0 +1,133 @@
+import asyncio
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.db import engine
+
+
+class RouteGate:
+    """Concurrency limit with a bounded wait queue for a single route template."""
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queued = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def acquire(self, timeout: float) -> bool:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return True
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            return False
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.queued -= 1
+
+    def release(self):
+        self._semaphore.release()
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that sheds load before requests reach the database pool.
+
+    Every route template (e.g. `/v1/todos/{item_id}`) gets its own concurrency
+    cap and bounded wait queue. A request is rejected with `503` and a
+    `Retry-After` header when the queue of its route is full, when it waits
+    longer than `admission_queue_timeout`, or when callers are currently
+    waiting for pool connections and the recent pool wait time exceeds
+    `admission_pool_wait_threshold`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int = settings.admission_max_concurrency,
+        max_queue: int = settings.admission_max_queue,
+        queue_timeout: float = settings.admission_queue_timeout,
+        pool_wait_threshold: float = settings.admission_pool_wait_threshold,
+        retry_after: int = settings.admission_retry_after,
+        route_limits: dict[str, int] | None = None,
+        exempt_paths: list[str] | None = None,
+    ):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.pool_wait_threshold = pool_wait_threshold
+        self.retry_after = retry_after
+        self.route_limits = (
+            settings.admission_route_limits if route_limits is None else route_limits
+        )
+        self.exempt_paths = tuple(
+            settings.admission_exempt_paths if exempt_paths is None else exempt_paths
+        )
+        self.gates: dict[str, RouteGate] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        template = self._route_template(scope)
+        if template is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self._pool_saturated():
+            await self._reject(scope, receive, send, "Database is overloaded")
+            return
+
+        gate = self._get_gate(template)
+        if not await gate.acquire(self.queue_timeout):
+            await self._reject(scope, receive, send, "Too many concurrent requests")
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+    def _route_template(self, scope: Scope) -> str | None:
+        app = scope.get("app")
+        if app is None:
+            return None
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", None)
+        return None
+
+    def _get_gate(self, template: str) -> RouteGate:
+        gate = self.gates.get(template)
+        if gate is None:
+            limit = self.route_limits.get(template, self.max_concurrency)
+            gate = self.gates[template] = RouteGate(limit, self.max_queue)
+        return gate
+
+    def _pool_saturated(self) -> bool:
+        wait_stats = getattr(engine.pool, "wait_stats", None)
+        return (
+            wait_stats is not None
+            and wait_stats.waiting > 0
+            and wait_stats.ewma_wait > self.pool_wait_threshold
+        )
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send, detail: str):
+        response = JSONResponse(
+            status_code=503,
+            content={"detail": detail},
+            headers={"Retry-After": str(self.retry_after)},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,206 @@
+import inspect
+from typing import Any, Literal, Sequence
+
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.deadline import request_deadline
+from app.core.router import BaseRouter, BaseRouterWithUser, CurrentUserDependency
+from app.core.transaction_manager import ITransactionManager, TManagerDep, transactional
+from app.users.models import User
+
+
+class Operation(BaseModel):
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    path: str = Field(..., examples=["/todos/", "/todos/42"])
+    body: dict[str, Any] | None = None
+
+
+class BatchRequest(BaseModel):
+    operations: list[Operation] = Field(..., min_length=1, max_length=settings.batch_max_operations)
+    atomic: bool = False
+
+
+class OperationResult(BaseModel):
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    committed: bool
+    results: list[OperationResult]
+
+
+class _Aborted(Exception):
+    def __init__(self, results: list[OperationResult]):
+        self.results = results
+
+
+def _error(status_code: int, detail: Any) -> OperationResult:
+    return OperationResult(status=status_code, body={"detail": detail})
+
+
+class _BatchExecution:
+    """Runs the operations of one batch request in one transaction."""
+
+    def __init__(
+        self,
+        transaction_manager: ITransactionManager,
+        targets: Sequence[tuple[BaseRouter, Any]],
+    ):
+        self.transaction_manager = transaction_manager
+        self.targets = targets
+
+    def _resolve(self, path: str) -> tuple[BaseRouter, Any, int | None] | None:
+        path = path.split("?", 1)[0].rstrip("/")
+        for routes, service in self.targets:
+            prefix = routes.router.prefix.rstrip("/")
+            if path == prefix:
+                return routes, service, None
+            rest = path.removeprefix(prefix + "/")
+            if rest != path and rest.isdigit():
+                return routes, service, int(rest)
+        return None
+
+    @staticmethod
+    def _route_name(method: str, item_id: int | None) -> str | None:
+        if item_id is None:
+            return {"GET": "get_items", "POST": "create_item"}.get(method)
+        return {
+            "GET": "get_item", "PUT": "update_item", "PATCH": "update_item", "DELETE": "delete_item"
+        }.get(method)
+
+    async def _dispatch(
+        self, routes: BaseRouter, service: Any, operation: Operation, item_id: int | None, user: User
+    ) -> OperationResult:
+        # Same calls and responses as the routes generated by `BaseRouter`.
+        args = (user,) if isinstance(routes, BaseRouterWithUser) else ()
+        method = operation.method
+        if method == "GET" and item_id is None:
+            items = await service.get_all(*args)
+            return OperationResult(status=200, body=[routes.serialize(item) for item in items])
+        if method == "GET":
+            return OperationResult(status=200, body=routes.serialize(await service.get_by_id(item_id, *args)))
+        if method == "POST":
+            item = routes.model_create.model_validate(operation.body or {})
+            created = await service.create(item, *args)
+            # The response needs the id before the transaction commits.
+            await self.transaction_manager.flush()
+            return OperationResult(status=200, body=routes.serialize(created))
+        if method in ("PUT", "PATCH"):
+            item = routes.model_update.model_validate(operation.body or {})
+            await service.update(item_id, *args, **item.model_dump(exclude_unset=True))
+            return OperationResult(status=200, body={"message": "Item has been successfully updated"})
+        if not await service.delete(item_id, *args):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Item not found or unauthorized access",
+            )
+        return OperationResult(status=status.HTTP_204_NO_CONTENT)
+
+    async def _run_one(self, operation: Operation, user: User) -> OperationResult:
+        target = self._resolve(operation.path)
+        if target is None:
+            return _error(status.HTTP_404_NOT_FOUND, "Not Found")
+        routes, service, item_id = target
+        route_name = self._route_name(operation.method, item_id)
+        if route_name is None:
+            return _error(status.HTTP_405_METHOD_NOT_ALLOWED, "Method Not Allowed")
+        if routes.route_dependencies.get(route_name):
+            # E.g. a rate limit: it only runs on the route itself.
+            return _error(status.HTTP_403_FORBIDDEN, "Operation is not available in a batch")
+        try:
+            async with self.transaction_manager.savepoint():
+                return await self._dispatch(routes, service, operation, item_id, user)
+        except HTTPException as e:
+            return _error(e.status_code, e.detail)
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_context=False)
+            return _error(status.HTTP_422_UNPROCESSABLE_ENTITY, jsonable_encoder(errors))
+        except IntegrityError:
+            return _error(status.HTTP_409_CONFLICT, "Conflict with existing data")
+
+    @transactional()
+    async def run(self, operations: list[Operation], atomic: bool, user: User) -> list[OperationResult]:
+        async with self.transaction_manager:
+            results: list[OperationResult] = []
+            for operation in operations:
+                result = await self._run_one(operation, user)
+                results.append(result)
+                if atomic and result.status >= 400:
+                    skipped = _error(status.HTTP_424_FAILED_DEPENDENCY, "A previous operation failed")
+                    results += [skipped] * (len(operations) - len(results))
+                    raise _Aborted(results)
+            return results
+
+
+class BatchRouter:
+    """
+    `POST /batch`: runs an ordered list of operations against the routes
+    generated by `BaseRouter`/`BaseRouterWithUser` in one HTTP round trip.
+
+    The user is authenticated once and all operations run in one transaction
+    that is committed once. Each operation runs in a savepoint and gets its own
+    status and body, the same as the route would return; a failed operation
+    is rolled back alone. With `atomic`, the first failure rolls back the whole
+    batch, the remaining operations are not run (`424`) and `committed` is false.
+
+    Operations on routes with extra `route_dependencies` (e.g. rate limits)
+    are rejected with `403`; list operations ignore filters and pagination.
+
+    Attributes:
+    - routers (Sequence[BaseRouter]): Routers whose routes may be called, matched by their prefix.
+    - current_user (CurrentUserDependency): Dependency that authenticates the user.
+    """
+
+    def __init__(
+        self,
+        routers: Sequence[BaseRouter],
+        current_user: CurrentUserDependency,
+        prefix: str = "/batch",
+        tags: list[str] | None = None,
+    ):
+        self.routers = list(routers)
+        self.current_user = current_user
+        self.router = APIRouter(prefix=prefix, tags=tags or ["batch"])
+        self._create_routes()
+
+    def _create_routes(self):
+        async def execute_batch(
+            *,
+            batch: BatchRequest = Body(...),
+            transaction_manager: TManagerDep,
+            user: User = Depends(self.current_user),
+            **services,
+        ) -> BatchResponse:
+            # Services share `transaction_manager`: FastAPI resolves the dependency once per request.
+            targets = [(routes, services[f"service_{i}"]) for i, routes in enumerate(self.routers)]
+            execution = _BatchExecution(transaction_manager, targets)
+            try:
+                results = await execution.run(batch.operations, batch.atomic, user)
+            except _Aborted as e:
+                return BatchResponse(committed=False, results=e.results)
+            return BatchResponse(committed=True, results=results)
+
+        signature = inspect.signature(execute_batch)
+        parameters = [p for p in signature.parameters.values() if p.kind != p.VAR_KEYWORD]
+        parameters += [
+            inspect.Parameter(
+                f"service_{i}",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Depends(routes.service_dependency),
+            )
+            for i, routes in enumerate(self.routers)
+        ]
+        execute_batch.__signature__ = signature.replace(parameters=parameters)
+
+        self.router.add_api_route(
+            "",
+            execute_batch,
+            methods=["POST"],
+            response_model=BatchResponse,
+            dependencies=[Depends(request_deadline())],
+        )
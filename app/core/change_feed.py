@@ -0,0 +1,134 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, AsyncIterator
+
+import asyncpg
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.logger import logger
+
+
+RESYNC_EVENT = {"op": "resync"}
+
+
+class Subscription:
+    """
+    Bounded queue of change events for one subscriber.
+
+    When the subscriber falls behind and the queue is full, pending events are
+    dropped and replaced by a single `resync` event telling the client to
+    refetch, so a slow consumer never grows memory on the worker.
+    """
+
+    def __init__(self, key: str, max_size: int):
+        self.key = key
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=max_size)
+
+    def put(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_EVENT)
+
+    async def get(self, timeout: float) -> dict | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ChangeFeed:
+    """
+    Fans out Postgres `NOTIFY` messages of one channel to in-process subscribers.
+
+    A single dedicated `LISTEN` connection per worker (outside of the engine
+    pool) is opened on the first subscription. Payloads are JSON objects and
+    are routed to subscribers by the value of `key_field`, e.g. the user id.
+    """
+
+    def __init__(self, channel: str, key_field: str = "user_id"):
+        self.channel = channel
+        self.key_field = key_field
+        self.subscribers: dict[str, set[Subscription]] = defaultdict(set)
+        self._connection: asyncpg.Connection | None = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _dsn() -> str:
+        return engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+    async def _ensure_listening(self):
+        async with self._lock:
+            if self._connection is not None and not self._connection.is_closed():
+                return
+            self._connection = await asyncpg.connect(self._dsn())
+            self._connection.add_termination_listener(self._on_connection_lost)
+            await self._connection.add_listener(self.channel, self._dispatch)
+            logger.info(f"Listening for changes on channel '{self.channel}'")
+
+    def _dispatch(self, connection, pid: int, channel: str, payload: str):
+        try:
+            event: dict[str, Any] = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Malformed payload on channel '{channel}': {payload}")
+            return
+        for subscription in self.subscribers.get(str(event.get(self.key_field)), ()):
+            subscription.put(event)
+
+    def _on_connection_lost(self, connection):
+        logger.warning(f"LISTEN connection for channel '{self.channel}' was lost")
+        self._connection = None
+        for subscriptions in self.subscribers.values():
+            for subscription in subscriptions:
+                subscription.put(RESYNC_EVENT)
+        if self.subscribers:
+            asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = 0.5
+        while self.subscribers:
+            try:
+                await self._ensure_listening()
+                return
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.error(f"Unable to re-establish LISTEN connection: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def subscribe(self, key: str) -> Subscription:
+        await self._ensure_listening()
+        subscription = Subscription(key, settings.change_feed_queue_size)
+        self.subscribers[key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.subscribers.get(subscription.key)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self.subscribers[subscription.key]
+
+    async def stream(self, request: Request, subscription: Subscription) -> AsyncIterator[str]:
+        """Yields server-sent events of a subscription until the client disconnects."""
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(settings.change_feed_heartbeat)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {event['op']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    async def close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            connection.remove_termination_listener(self._on_connection_lost)
+            await connection.close()
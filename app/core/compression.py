@@ -0,0 +1,282 @@
+import gzip
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+class StreamCompressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class Codec:
+    """One-shot and streaming compression for one content coding."""
+
+    def __init__(
+        self,
+        name: str,
+        compress: Callable[[bytes], bytes],
+        compressor: Callable[[], StreamCompressor],
+    ):
+        self.name = name
+        self.compress = compress
+        self.compressor = compressor
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressobj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush, so every chunk of a streaming response reaches the client right away.
+        return self._compressobj.compress(data) + self._compressobj.flush(zlib.Z_SYNC_FLUSH)
+
+    def flush(self) -> bytes:
+        return self._compressobj.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_codecs() -> dict[str, Codec]:
+    """Codecs in server preference order; brotli and zstd only with the `compression` extra installed."""
+    codecs: dict[str, Codec] = {}
+    if zstandard is not None:
+        level = settings.compression_zstd_level
+        codecs["zstd"] = Codec(
+            "zstd",
+            zstandard.ZstdCompressor(level=level).compress,
+            lambda: _ZstdStream(level),
+        )
+    if brotli is not None:
+        quality = settings.compression_brotli_quality
+        codecs["br"] = Codec(
+            "br",
+            lambda data: brotli.compress(data, quality=quality),
+            lambda: _BrotliStream(quality),
+        )
+    level = settings.compression_gzip_level
+    codecs["gzip"] = Codec(
+        "gzip",
+        lambda data: gzip.compress(data, compresslevel=level, mtime=0),
+        lambda: _GzipStream(level),
+    )
+    return codecs
+
+
+def negotiate(accept_encoding: str, codecs: dict[str, Codec]) -> Codec | None:
+    """Picks the codec with the highest client `q` value, ties broken by server preference."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        weight = 1.0
+        parameter = parameters.strip()
+        if parameter.startswith("q="):
+            try:
+                weight = float(parameter[2:])
+            except ValueError:
+                continue
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for name, codec in codecs.items():
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = codec, weight
+    return best
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by `(ETag, coding)`."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    def get(self, etag: str, coding: str) -> bytes | None:
+        body = self._entries.get((etag, coding))
+        if body is not None:
+            self._entries.move_to_end((etag, coding))
+        return body
+
+    def put(self, etag: str, coding: str, body: bytes):
+        self._entries[(etag, coding)] = body
+        self._entries.move_to_end((etag, coding))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses responses with gzip, brotli or zstd.
+
+    The coding is negotiated from `Accept-Encoding`. Complete bodies smaller
+    than `minimum_size` are sent as is. Streaming responses are compressed
+    chunk by chunk and flushed after every chunk. A body with an `ETag` (see
+    the generic GET routes) is compressed once per coding and then served
+    from `CompressedBodyCache` while the ETag stays the same. CPU time, ratio
+    and cache hits are recorded in metrics.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.compression_minimum_size,
+        excluded_types: list[str] | None = None,
+        cache_size: int = settings.compression_cache_size,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_types = tuple(
+            settings.compression_excluded_types if excluded_types is None else excluded_types
+        )
+        self.codecs = available_codecs()
+        self.cache = CompressedBodyCache(cache_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        codec = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.codecs)
+        if codec is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self, codec, send)(scope, receive)
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, codec: Codec, send: Send):
+        self.middleware = middleware
+        self.codec = codec
+        self.send = send
+        self.start_message: Message | None = None
+        self.stream: StreamCompressor | None = None
+        self.raw_size = 0
+        self.compressed_size = 0
+        self.cpu_time = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive):
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    def _compress(self, function: Callable[[bytes], bytes], data: bytes) -> bytes:
+        started = time.thread_time()
+        compressed = function(data)
+        self.cpu_time += time.thread_time() - started
+        self.raw_size += len(data)
+        self.compressed_size += len(compressed)
+        return compressed
+
+    def _record(self):
+        labels = {"encoding": self.codec.name}
+        metrics.observe("http.compression.cpu_seconds", self.cpu_time, **labels)
+        metrics.inc("http.compression.bytes_in", self.raw_size, **labels)
+        metrics.inc("http.compression.bytes_out", self.compressed_size, **labels)
+        if self.raw_size:
+            metrics.observe("http.compression.ratio", self.compressed_size / self.raw_size, **labels)
+
+    def _skip(self, start_message: Message) -> bool:
+        headers = Headers(raw=start_message["headers"])
+        return (
+            "content-encoding" in headers
+            or start_message["status"] < 200
+            or start_message["status"] in (204, 304)
+            or headers.get("content-type", "").startswith(self.middleware.excluded_types)
+        )
+
+    async def send_wrapper(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk tells whether compression is worth it.
+            self.start_message = message
+        elif message["type"] != "http.response.body":
+            await self.send(message)
+        elif self.start_message is not None:
+            start_message, self.start_message = self.start_message, None
+            await self._send_start(start_message, message)
+        else:
+            await self._send_stream_chunk(message)
+
+    async def _send_start(self, start_message: Message, message: Message):
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=start_message["headers"])
+
+        if self._skip(start_message):
+            await self.send(start_message)
+            await self.send(message)
+            return
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self.send(start_message)
+            await self.send(message)
+            return
+
+        headers["Content-Encoding"] = self.codec.name
+        if more_body:
+            del headers["Content-Length"]
+            self.stream = self.codec.compressor()
+            await self.send(start_message)
+            await self._send_stream_chunk(message)
+            return
+
+        etag = headers.get("etag")
+        compressed = self.middleware.cache.get(etag, self.codec.name) if etag else None
+        if compressed is None:
+            compressed = self._compress(self.codec.compress, body)
+            if etag:
+                self.middleware.cache.put(etag, self.codec.name, compressed)
+            self._record()
+        else:
+            metrics.inc("http.compression.cache_hits", encoding=self.codec.name)
+        headers["Content-Length"] = str(len(compressed))
+        await self.send(start_message)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    async def _send_stream_chunk(self, message: Message):
+        if self.stream is None:
+            await self.send(message)
+            return
+        more_body = message.get("more_body", False)
+        chunk = self._compress(self.stream.compress, message.get("body", b""))
+        if not more_body:
+            chunk += self._compress(lambda _: self.stream.flush(), b"")
+            self._record()
+            self.stream = None
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
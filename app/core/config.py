@@ -16,7 +16,75 @@ class Settings(BaseSettings):
     email_password: str = ""
     smtp_address: str = ""
     smtp_port: str = ""
-        
+    health_check_timeout: float = 2.0
+    health_check_cache_ttl: float = 1.0
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 32
+    admission_max_queue: int = 64
+    admission_queue_timeout: float = 2.0
+    admission_pool_wait_threshold: float = 0.5
+    admission_retry_after: int = 1
+    admission_route_limits: dict[str, int] = {}
+    admission_exempt_paths: list[str] = [
+        "/health", "/docs", "/redoc", "/openapi.json", "/v1/todos/stream"
+    ]
+    rate_limit_enabled: bool = True
+    rate_limit_backend_url: str = ""
+    rate_limit_max_keys: int = 100_000
+    rate_limit_period: float = 60.0
+    rate_limit_ip_capacity: int = 20
+    rate_limit_user_capacity: int = 5
+    password_hash_workers: int = 2
+    password_hash_max_queue: int = 64
+    idempotency_backend: str = "memory"
+    idempotency_ttl: float = 86400.0
+    idempotency_max_entries: int = 10_000
+    change_feed_queue_size: int = 100
+    change_feed_heartbeat: float = 15.0
+    database_replica_urls: list[str] = []
+    replica_read_your_writes_window: float = 5.0
+    request_statement_budget: int = 50
+    transaction_retries: int = 3
+    transaction_retry_base_delay: float = 0.05
+    transaction_retry_max_delay: float = 1.0
+    request_timeout: float = 10.0
+    request_timeout_max: float = 30.0
+    session_paths: list[str] = ["/v1/auth/google"]
+    google_server_metadata_url: str = "https://accounts.google.com/.well-known/openid-configuration"
+    oauth_metadata_ttl: float = 86400.0
+    token_cache_size: int = 10_000
+    token_cache_max_age: float = 300.0
+    token_revocation_refresh_interval: float = 5.0
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+    compression_cache_size: int = 256
+    compression_excluded_types: list[str] = [
+        "text/event-stream",
+        "image/",
+        "audio/",
+        "video/",
+        "application/zip",
+        "application/gzip",
+    ]
+    batch_max_ids: int = 100
+    batch_max_operations: int = 50
+    entity_cache_enabled: bool = False
+    entity_cache_size: int = 10_000
+    entity_cache_ttl: float = 30.0
+    entity_count_cache_size: int = 10_000
+    entity_count_cache_ttl: float = 5.0
+    loop_monitor_enabled: bool = False
+    loop_monitor_interval: float = 0.1
+    loop_monitor_threshold: float = 0.25
+    memory_profiler_frames: int = 10
+    memory_profiler_max_snapshots: int = 5
+    memory_profiler_signal: str = ""
+    metrics_token: str = ""
+    idempotency_lease_margin: float = 30.0
+
     class Config:
         env_file = ".env"
         
@@ -0,0 +1,138 @@
+"""
+Per-user entity counts kept in the `entity_count` table.
+
+Rows are maintained by statement-level triggers on the counted tables (see
+migration 7c2e9a4d5f18), so every insert and delete, whatever code path runs
+it, adjusts the owner's count in the same transaction. Moving a row to another
+user or truncating a table is not tracked; reconciliation fixes such drift:
+
+    python -m app.core.counters reconcile --entity todo --batch-size 1000
+"""
+import argparse
+import asyncio
+import uuid
+
+from sqlalchemy import UUID, BigInteger, Column, String, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.db import engine
+from app.core.logger import logger
+from app.core.models import Base
+from app.core.repository import SQLAlchemyRepository, repository_registry
+
+
+class EntityCount(Base):
+    __tablename__ = "entity_count"
+
+    entity = Column(String(64), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    count = Column(BigInteger, nullable=False, server_default=text("0"))
+
+
+class EntityCountRepository(SQLAlchemyRepository):
+    async def get_count(self, entity: str, user_id) -> int:
+        result = await self.session.execute(
+            select(EntityCount.count).where(
+                EntityCount.entity == entity, EntityCount.user_id == user_id
+            )
+        )
+        return result.scalar_one_or_none() or 0
+
+
+repository_registry.register(EntityCount, EntityCountRepository)
+
+
+# Counted tables by entity name; the table must have a `user_id` column.
+COUNTED_TABLES = {"todo": "todo"}
+
+LOCK_BATCH = text(
+    """
+    SELECT user_id FROM entity_count
+    WHERE entity = :entity AND user_id > :last_user_id
+    ORDER BY user_id
+    LIMIT :batch_size
+    FOR UPDATE
+    """
+)
+
+
+async def _reconcile_batch(
+    connection: AsyncConnection, entity: str, table: str, user_ids: list
+) -> int:
+    # A separate statement after the locks are held: its snapshot sees every
+    # row whose trigger already updated a locked counter.
+    result = await connection.execute(
+        text(
+            f"""
+            WITH actual AS (
+                SELECT c.user_id, (SELECT count(*) FROM {table} t WHERE t.user_id = c.user_id) AS count
+                FROM entity_count c
+                WHERE c.entity = :entity AND c.user_id = ANY(:user_ids)
+            )
+            UPDATE entity_count c SET count = actual.count
+            FROM actual
+            WHERE c.entity = :entity AND c.user_id = actual.user_id AND c.count <> actual.count
+            """
+        ),
+        {"entity": entity, "user_ids": user_ids},
+    )
+    return result.rowcount
+
+
+async def reconcile(entity: str, batch_size: int, pause: float) -> int:
+    """
+    Recounts the rows of every user and fixes counters that drifted.
+
+    Counters are locked in batches in `user_id` order (the order the triggers
+    use, so they cannot deadlock with writers), which makes concurrent inserts
+    and deletes of those users wait for the batch; their trigger then applies
+    the change on top of the corrected count. Returns the number of fixed counters.
+    """
+    table = COUNTED_TABLES[entity]
+    async with engine.begin() as connection:
+        await connection.execute(
+            text(
+                f"""
+                INSERT INTO entity_count (entity, user_id, count)
+                SELECT DISTINCT CAST(:entity AS varchar), user_id, 0 FROM {table}
+                ON CONFLICT DO NOTHING
+                """
+            ),
+            {"entity": entity},
+        )
+
+    last_user_id, fixed = uuid.UUID(int=0), 0
+    while True:
+        async with engine.begin() as connection:
+            params = {"entity": entity, "batch_size": batch_size, "last_user_id": last_user_id}
+            user_ids = list((await connection.execute(LOCK_BATCH, params)).scalars())
+            if not user_ids:
+                break
+            fixed += await _reconcile_batch(connection, entity, table, user_ids)
+        last_user_id = user_ids[-1]
+        logger.info(f"Reconciled {entity} counts up to user {last_user_id}, {fixed} fixed")
+        await asyncio.sleep(pause)
+    return fixed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reconcile_parser = subparsers.add_parser("reconcile", help="recount and fix drifted counters")
+    reconcile_parser.add_argument("--entity", choices=sorted(COUNTED_TABLES), default="todo")
+    reconcile_parser.add_argument("--batch-size", type=int, default=1000)
+    reconcile_parser.add_argument("--pause", type=float, default=0.05, help="seconds between batches")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            fixed = await reconcile(args.entity, args.batch_size, args.pause)
+            logger.info(f"Fixed {fixed} {args.entity} counters")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
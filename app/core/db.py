@@ -1,14 +1,110 @@
+import itertools
+import time
+from dataclasses import dataclass
 from typing import AsyncGenerator
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio.session import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
 
 
-engine: AsyncEngine = create_async_engine(settings.database_url, echo=False, future=True)
+@dataclass
+class PoolWaitStats:
+    """Checkout wait statistics collected by `InstrumentedQueuePool`."""
+
+    checkouts: int = 0
+    waiting: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    ewma_wait: float = 0.0
+    timeouts: int = 0
+
+    def record(self, elapsed: float, alpha: float = 0.2):
+        self.checkouts += 1
+        self.total_wait += elapsed
+        self.max_wait = max(self.max_wait, elapsed)
+        self.ewma_wait = elapsed if self.checkouts == 1 else (
+            alpha * elapsed + (1 - alpha) * self.ewma_wait
+        )
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that measures how long callers wait for a connection.
+
+    The statistics are kept in memory on the pool instance and are used by the
+    readiness probe and the admission controller.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def connect(self):
+        started = time.perf_counter()
+        self.wait_stats.waiting += 1
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            self.wait_stats.waiting -= 1
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+
+engine: AsyncEngine = create_async_engine(
+    settings.database_url, echo=False, future=True, poolclass=InstrumentedQueuePool
+)
 
 async_session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
+replica_engines: list[AsyncEngine] = [
+    create_async_engine(url, echo=False, future=True, poolclass=InstrumentedQueuePool)
+    for url in settings.database_replica_urls
+]
+
+replica_session_makers = [
+    async_sessionmaker(bind=replica_engine, class_=AsyncSession, expire_on_commit=False)
+    for replica_engine in replica_engines
+]
+
+_replica_session_makers = itertools.cycle(replica_session_makers)
+
+
+def get_replica_session_maker() -> async_sessionmaker[AsyncSession] | None:
+    """Returns the session factory of the next replica (round robin), if any are configured."""
+    return next(_replica_session_makers, None)
+
+
+def get_pool_stats(async_engine: AsyncEngine = engine) -> dict:
+    """Returns size, checkout and wait statistics of the engine pool."""
+    pool = async_engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(
+            {
+                "waiting": wait_stats.waiting,
+                "checkouts": wait_stats.checkouts,
+                "timeouts": wait_stats.timeouts,
+                "avg_wait_ms": round(
+                    wait_stats.total_wait / wait_stats.checkouts * 1000, 3
+                ) if wait_stats.checkouts else 0.0,
+                "ewma_wait_ms": round(wait_stats.ewma_wait * 1000, 3),
+                "max_wait_ms": round(wait_stats.max_wait * 1000, 3),
+            }
+        )
+    return stats
+
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as async_session:
@@ -0,0 +1,42 @@
+import time
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable
+
+from fastapi import Header
+
+from app.core.config import settings
+
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+def remaining_time() -> float | None:
+    """Seconds left until the deadline of the current request, `None` if it has none."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def request_deadline(timeout: float | None = None) -> Callable[..., AsyncIterator[None]]:
+    """
+    Creates a dependency that sets the deadline of a request.
+
+    The deadline is `timeout` seconds (default `REQUEST_TIMEOUT`) from now. Clients
+    may ask for a different one with the `X-Request-Timeout` header, capped at
+    `REQUEST_TIMEOUT_MAX`. Transactions opened while handling the request get a
+    matching `statement_timeout` and are cancelled when the deadline passes.
+    """
+    default = settings.request_timeout if timeout is None else timeout
+
+    async def dependency(
+        x_request_timeout: float | None = Header(
+            None, gt=0, description="Request deadline in seconds"
+        ),
+    ) -> AsyncIterator[None]:
+        seconds = min(x_request_timeout or default, settings.request_timeout_max)
+        token = _deadline.set(time.monotonic() + seconds)
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    return dependency
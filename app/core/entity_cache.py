@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable
+
+from app.core.metrics import metrics
+
+
+class EntityCache:
+    """
+    Per-worker LRU of read models keyed by `(scope, id)`, e.g. `(user_id, todo_id)`.
+
+    Values are shared between requests, so store immutable read models (e.g.
+    Pydantic schemas), not ORM entities tied to a session.
+
+    Entries expire after `ttl` seconds, which bounds how long a change made on
+    another worker can be served stale. Writes on this worker invalidate their
+    keys after commit. An invalidation also leaves a marker, so a read that
+    started before it cannot put the old value back (see `generation`). When
+    the LRU evicts a marker, puts from reads that started before it are
+    skipped for keys that are not cached.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._generation = 0
+        # Generation of the newest invalidation marker dropped by `_evict`.
+        self._evicted_generation = 0
+        # key -> (expires_at, generation, value); value None marks an invalidation.
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        metrics.gauge(f"entity_cache.{name}.hits", lambda: self.hits)
+        metrics.gauge(f"entity_cache.{name}.misses", lambda: self.misses)
+
+    @property
+    def generation(self) -> int:
+        """Taken before reading from the database and passed to `put_many`."""
+        return self._generation
+
+    def get_many(self, keys: Iterable[Hashable]) -> dict[Hashable, Any]:
+        now = time.monotonic()
+        found = {}
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] is None or entry[0] <= now:
+                self.misses += 1
+                continue
+            self._entries.move_to_end(key)
+            found[key] = entry[2]
+            self.hits += 1
+        return found
+
+    def put_many(self, values: dict[Hashable, Any], generation: int):
+        expires_at = time.monotonic() + self.ttl
+        for key, value in values.items():
+            entry = self._entries.get(key)
+            if entry is None and self._evicted_generation > generation:
+                continue
+            if entry is not None and entry[2] is None and entry[1] > generation:
+                continue
+            self._entries[key] = (expires_at, generation, value)
+            self._entries.move_to_end(key)
+        self._evict()
+
+    def invalidate(self, key: Hashable):
+        self._generation += 1
+        self._entries[key] = (time.monotonic() + self.ttl, self._generation, None)
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            _, (_, generation, value) = self._entries.popitem(last=False)
+            if value is None:
+                self._evicted_generation = max(self._evicted_generation, generation)
@@ -1,3 +1,4 @@
+import math
 from typing import Any, TypeAlias
 from fastapi import HTTPException, status
 from pydantic import BaseModel
@@ -5,7 +6,16 @@ from pydantic import BaseModel
 
 class MissingRepositoryError(Exception):
     def __init__(self, entity_name: str):
-        message = f"В TransactionManager в метод __aenter__ необходимо добавить атрибут '{entity_name}'."
+        message = f"Модель '{entity_name}' необходимо зарегистрировать в repository_registry."
+        super().__init__(message)
+
+
+class UnindexedListingError(Exception):
+    def __init__(self, model_name: str, column: str, expected: str):
+        message = (
+            f"Фильтр или сортировка по {model_name}.{column} требует индекса, "
+            f"начинающегося с ({expected})."
+        )
         super().__init__(message)
 
 
@@ -19,9 +29,22 @@ class AppException(HTTPException):
     """Base class for all courses exceptions"""
 
     def __init__(
-        self, status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR, detail: str = ""
+        self,
+        status_code: int = status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail: str = "",
+        headers: dict[str, str] | None = None,
     ):
-        super().__init__(status_code=status_code, detail=detail)
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+
+
+class MissingPartitionKeyError(AppException):
+    """Exception raised when a query on a partitioned table does not filter by its partition key."""
+
+    def __init__(self, model_name: str, partition_key: str):
+        super().__init__(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Запрос к {model_name} должен фильтровать по ключу партиционирования '{partition_key}'.",
+        )
 
 
 class IncorrectIdException(AppException):
@@ -44,6 +67,67 @@ class UnauthorizedAccessException(AppException):
         )
 
 
+class TooManyRequestsException(AppException):
+    """Exception raised when a client exceeds its rate limit."""
+
+    def __init__(self, retry_after: float, message="Too many requests"):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=message,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+class IdempotencyKeyReusedException(AppException):
+    """Exception raised when a key is reused with a different request payload."""
+
+    def __init__(self, message="Idempotency-Key has already been used with a different request"):
+        super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=message)
+
+
+class IdempotencyConflictException(AppException):
+    """Exception raised when a request with the same key is running on another worker."""
+
+    def __init__(self, message="A request with this Idempotency-Key is already in progress"):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=message,
+            headers={"Retry-After": "1"},
+        )
+
+
+class TransactionRetryExhaustedException(AppException):
+    """Exception raised when a transaction keeps failing with serialization or connection errors."""
+
+    def __init__(self, message="The request conflicted with concurrent changes, please retry"):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=message,
+            headers={"Retry-After": "1"},
+        )
+
+
+class DeadlineExceededException(AppException):
+    """Exception raised when a request does not finish before its deadline."""
+
+    def __init__(self, message="Request deadline exceeded"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=message)
+
+
+class InvalidCursorException(AppException):
+    """Exception raised when a pagination cursor is malformed or belongs to another sort order."""
+
+    def __init__(self, message="Invalid pagination cursor"):
+        super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=message)
+
+
+class MemoryProfilerStateException(AppException):
+    """Exception raised when a profiling operation needs tracing or a snapshot that is missing."""
+
+    def __init__(self, message="tracemalloc is not running"):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=message)
+
+
 OpenAPIResponses: TypeAlias = dict[int | str, dict[str, Any]]
 
 
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from functools import cached_property
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.db import engine, get_pool_stats
+from app.core.logger import logger
+
+
+class ReadinessProbe:
+    """
+    Cheap database readiness check with a short-lived cached result.
+
+    The probe runs `SELECT 1` (and reads the applied Alembic revision) with a
+    bounded timeout. Results are cached for `cache_ttl` seconds and concurrent
+    callers share a single in-flight check, so frequent orchestrator probes
+    never hold more than one pooled connection at a time.
+    """
+
+    def __init__(
+        self,
+        async_engine: AsyncEngine,
+        timeout: float,
+        cache_ttl: float,
+        alembic_config_path: str = "alembic.ini",
+    ):
+        self.engine = async_engine
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self.alembic_config_path = alembic_config_path
+        self._result: dict | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @cached_property
+    def migration_head(self) -> str | None:
+        try:
+            script = ScriptDirectory.from_config(Config(self.alembic_config_path))
+            return script.get_current_head()
+        except Exception as e:
+            logger.warning(f"Unable to resolve alembic head: {e}")
+            return None
+
+    async def check(self) -> dict:
+        if self._is_fresh():
+            return self._result
+        async with self._lock:
+            if not self._is_fresh():
+                self._result = await self._run_check()
+                self._checked_at = time.monotonic()
+        return self._result
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._result is not None
+            and time.monotonic() - self._checked_at < self.cache_ttl
+        )
+
+    async def _run_check(self) -> dict:
+        started = time.perf_counter()
+        database = {"status": "ok", "revision": None}
+        try:
+            database["revision"] = await asyncio.wait_for(self._probe(), self.timeout)
+        except asyncio.TimeoutError:
+            database["status"] = "timeout"
+        except Exception as e:
+            logger.error(f"Readiness probe failed: {e}")
+            database["status"] = "error"
+        database["latency_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+        head = self.migration_head
+        return {
+            "status": "ok" if database["status"] == "ok" else "unavailable",
+            "database": database,
+            "migrations": {
+                "head": head,
+                "current": database["revision"],
+                "up_to_date": head is not None and head == database["revision"],
+            },
+            "pool": get_pool_stats(self.engine),
+        }
+
+    async def _probe(self) -> str | None:
+        async with self.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            has_version_table = await connection.scalar(
+                text("SELECT to_regclass('alembic_version') IS NOT NULL")
+            )
+            if not has_version_table:
+                return None
+            return await connection.scalar(text("SELECT version_num FROM alembic_version"))
+
+
+readiness_probe = ReadinessProbe(
+    engine,
+    timeout=settings.health_check_timeout,
+    cache_ttl=settings.health_check_cache_ttl,
+)
@@ -0,0 +1,280 @@
+import asyncio
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+from fastapi import status
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.db import async_session_maker
+from app.core.exceptions import IdempotencyConflictException, IdempotencyKeyReusedException
+from app.core.logger import logger
+from app.core.models import Base
+
+
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_key"
+
+    key = Column(String(512), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status_code: int | None = None
+    body: bytes | None = None
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+class IdempotencyStore(ABC):
+    """Storage for responses of requests carrying an `Idempotency-Key` header."""
+
+    @abstractmethod
+    async def get(self, key: str) -> StoredResponse | None:
+        """Returns the stored (possibly still pending) entry for a key."""
+        ...
+
+    @abstractmethod
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        """
+        Claims a key for execution. Returns False if it is already claimed.
+
+        The claim is a lease that outlives the request deadline by a margin, so
+        a key held by a crashed worker can be claimed again once it expires.
+        """
+        ...
+
+    @abstractmethod
+    async def save(self, key: str, status_code: int, body: bytes):
+        """Stores the response of a completed request for the full TTL."""
+        ...
+
+    @abstractmethod
+    async def release(self, key: str):
+        """Drops a claim after a failed execution so the request can be retried."""
+        ...
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """
+    Process-local store with TTL eviction.
+
+    Completed responses share one TTL, so insertion order is also expiry order
+    and stale entries are dropped from the front of the ordered dict, as are
+    the oldest ones beyond `max_entries`. Pending reservations are kept apart
+    and never evicted by size: dropping one would let a duplicate run again.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, lease: float):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lease = lease
+        self._entries: OrderedDict[str, tuple[float, StoredResponse]] = OrderedDict()
+        self._pending: dict[str, tuple[float, StoredResponse]] = {}
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def _pending_entry(self, key: str) -> StoredResponse | None:
+        entry = self._pending.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._pending[key]
+            return None
+        return entry[1]
+
+    async def get(self, key: str) -> StoredResponse | None:
+        self._evict()
+        entry = self._entries.get(key)
+        return entry[1] if entry else self._pending_entry(key)
+
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        self._evict()
+        if key in self._entries or self._pending_entry(key) is not None:
+            return False
+        self._pending[key] = (time.monotonic() + self.lease, StoredResponse(fingerprint))
+        return True
+
+    async def save(self, key: str, status_code: int, body: bytes):
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            logger.warning(f"Idempotency key {key!r} is no longer reserved, response not stored")
+            return
+        entry[1].status_code = status_code
+        entry[1].body = body
+        self._entries[key] = (time.monotonic() + self.ttl, entry[1])
+        self._evict()
+
+    async def release(self, key: str):
+        self._pending.pop(key, None)
+
+
+class PostgresIdempotencyStore(IdempotencyStore):
+    """
+    Store shared between replicas, backed by the `idempotency_key` table.
+
+    Each operation uses its own short transaction so that a claim is visible
+    to other workers before the request itself commits. A pending row expires
+    after `lease` seconds and only a completed one is kept for `ttl`.
+    """
+
+    def __init__(self, ttl: float, lease: float, purge_probability: float = 0.01):
+        self.ttl = ttl
+        self.lease = lease
+        self.purge_probability = purge_probability
+
+    @staticmethod
+    def _expires_at(seconds: float) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+    async def get(self, key: str) -> StoredResponse | None:
+        async with async_session_maker() as session:
+            record = await session.scalar(
+                select(IdempotencyRecord).where(
+                    IdempotencyRecord.key == key,
+                    IdempotencyRecord.expires_at > datetime.now(timezone.utc),
+                )
+            )
+            if record is None:
+                return None
+            return StoredResponse(record.fingerprint, record.status_code, record.body)
+
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        now = datetime.now(timezone.utc)
+        statement = (
+            insert(IdempotencyRecord)
+            .values(key=key, fingerprint=fingerprint, expires_at=self._expires_at(self.lease))
+            .on_conflict_do_update(
+                index_elements=[IdempotencyRecord.key],
+                set_={
+                    "fingerprint": fingerprint,
+                    "status_code": None,
+                    "body": None,
+                    "expires_at": self._expires_at(self.lease),
+                },
+                where=IdempotencyRecord.expires_at <= now,
+            )
+            .returning(IdempotencyRecord.key)
+        )
+        async with async_session_maker() as session:
+            claimed = await session.scalar(statement)
+            if random.random() < self.purge_probability:
+                await session.execute(
+                    delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= now)
+                )
+            await session.commit()
+        return claimed is not None
+
+    async def save(self, key: str, status_code: int, body: bytes):
+        statement = (
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.key == key, IdempotencyRecord.status_code.is_(None))
+            .values(status_code=status_code, body=body, expires_at=self._expires_at(self.ttl))
+            .returning(IdempotencyRecord.key)
+        )
+        async with async_session_maker() as session:
+            saved = await session.scalar(statement)
+            await session.commit()
+        if saved is None:
+            logger.warning(f"Idempotency key {key!r} is no longer reserved, response not stored")
+
+    async def release(self, key: str):
+        async with async_session_maker() as session:
+            await session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key))
+            await session.commit()
+
+
+class IdempotencyManager:
+    """
+    Executes a request at most once per idempotency key.
+
+    Completed responses are replayed from the store. Duplicates arriving while
+    the first request is still running on this worker wait for its result
+    instead of executing again; duplicates running on another worker get `409`.
+    """
+
+    def __init__(self, store: IdempotencyStore):
+        self.store = store
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    async def execute(
+        self,
+        key: str,
+        fingerprint: str,
+        handler: Callable[[], Awaitable[Any]],
+        status_code: int = status.HTTP_200_OK,
+    ) -> Response:
+        while True:
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                await asyncio.shield(in_flight)
+                continue
+
+            stored = await self.store.get(key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    raise IdempotencyKeyReusedException()
+                if not stored.completed:
+                    raise IdempotencyConflictException()
+                return self._replay(stored)
+
+            if not await self.store.reserve(key, fingerprint):
+                continue
+            return await self._run(key, handler, status_code)
+
+    async def _run(
+        self, key: str, handler: Callable[[], Awaitable[Any]], status_code: int
+    ) -> JSONResponse:
+        done = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            content = await handler()
+            response = JSONResponse(status_code=status_code, content=content)
+            await self.store.save(key, response.status_code, bytes(response.body))
+            return response
+        except BaseException:
+            await self.store.release(key)
+            raise
+        finally:
+            del self._in_flight[key]
+            done.set_result(None)
+
+    @staticmethod
+    def _replay(stored: StoredResponse) -> Response:
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    lease = settings.request_timeout_max + settings.idempotency_lease_margin
+    if settings.idempotency_backend == "postgres":
+        return PostgresIdempotencyStore(settings.idempotency_ttl, lease)
+    return InMemoryIdempotencyStore(
+        settings.idempotency_ttl, settings.idempotency_max_entries, lease
+    )
+
+
+idempotency_manager = IdempotencyManager(get_idempotency_store())
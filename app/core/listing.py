@@ -0,0 +1,217 @@
+import base64
+import binascii
+import inspect
+import json
+from dataclasses import dataclass
+from typing import Any, Sequence, Type
+
+from fastapi import Query
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Column
+from sqlalchemy.ext.declarative import DeclarativeMeta
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression
+
+from app.core.exceptions import InvalidCursorException, UnindexedListingError
+
+
+OPERATORS = ("eq", "prefix", "gt", "gte", "lt", "lte")
+
+# Byte order: a prefix is then exactly a range of keys.
+PREFIX_COLLATIONS = ("C", "POSIX")
+
+
+@dataclass(frozen=True)
+class Filter:
+    """
+    Query parameter `name` translated into `<column> <op> :value`.
+
+    `op` is one of `eq`, `prefix`, `gt`, `gte`, `lt` and `lte`. `prefix` is sent
+    as a `>= AND <` range, so it needs an index with a byte order ("C") collation.
+    """
+
+    name: str
+    column: str
+    op: str = "eq"
+
+
+def prefix_upper_bound(prefix: str) -> str | None:
+    """Smallest string greater than every string starting with `prefix`, None if unbounded."""
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+
+def _index_column(expression) -> tuple[str | None, str | None]:
+    if isinstance(expression, Column):
+        return expression.name, None
+    if isinstance(expression, BinaryExpression) and expression.operator is operators.collate:
+        return expression.left.name, expression.right.collation
+    return None, None
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    """Filters, order and keyset position of one list request, parsed by `Listing`."""
+
+    listing: "Listing"
+    filters: tuple[tuple[Filter, Any], ...]
+    sort: str
+    after: tuple[Any, Any] | None
+    limit: int | None
+
+    @property
+    def sort_column(self) -> str:
+        return self.sort.removeprefix("-")
+
+    @property
+    def descending(self) -> bool:
+        return self.sort.startswith("-")
+
+    def page(self, rows: Sequence[Any]) -> tuple[Sequence[Any], str | None]:
+        """
+        Splits the `limit + 1` rows fetched by the repository into the page and
+        the cursor of the next one (None on the last page).
+        """
+        if self.limit is None or len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        last = rows[-1]
+        key = [self.sort, getattr(last, self.sort_column), getattr(last, self.listing.tiebreaker)]
+        cursor = json.dumps(jsonable_encoder(key), separators=(",", ":")).encode()
+        return rows, base64.urlsafe_b64encode(cursor).decode().rstrip("=")
+
+
+class Listing:
+    """
+    Whitelisted filters and sort orders of a generic list route.
+
+    Every filtered or sorted column must lead an index right after the `scope`
+    columns the service always filters on (e.g. `user_id`), and sort columns
+    must be followed by the `tiebreaker` (a unique column) in that index, so
+    each page is a single index range scan. This is checked once by `validate`
+    when the router is built; a missing index raises `UnindexedListingError`.
+
+    Pages are keyset paginated: `limit` rows ordered by `(sort, tiebreaker)`
+    and an opaque cursor with the key of the last row.
+    """
+
+    def __init__(
+        self,
+        model: Type[DeclarativeMeta],
+        filters: Sequence[Filter] = (),
+        sort: Sequence[str] = (),
+        default_sort: str = "id",
+        tiebreaker: str = "id",
+        max_limit: int = 100,
+    ):
+        self.model = model
+        self.filters = tuple(filters)
+        self.sort = tuple(dict.fromkeys((tiebreaker, *sort)))
+        self.default_sort = default_sort
+        self.tiebreaker = tiebreaker
+        self.max_limit = max_limit
+        self.collations: dict[str, str | None] = {}
+        for item in self.filters:
+            if item.op not in OPERATORS:
+                raise ValueError(f"Unknown filter operator '{item.op}'")
+            if item.name in ("sort", "cursor", "limit"):
+                raise ValueError(f"Filter name '{item.name}' is reserved")
+        if len({(item.column, item.op) for item in self.filters}) != len(self.filters):
+            raise ValueError("Filters must differ in column or operator")
+        if default_sort.removeprefix("-") not in self.sort:
+            raise ValueError(f"Default sort '{default_sort}' is not a sort column")
+
+    def validate(self, scope: Sequence[str] = ()):
+        """Resolves the index (and its collation) behind every filtered and sorted column."""
+        table = self.model.__table__
+        indexes = [[(column.name, None) for column in table.primary_key.columns]]
+        indexes += [[_index_column(e) for e in index.expressions] for index in table.indexes]
+        position = len(scope)
+
+        for column in dict.fromkeys([*(f.column for f in self.filters), *self.sort]):
+            if column in self.sort and table.c[column].nullable:
+                # Rows with NULL keys would be skipped by the keyset comparison.
+                raise ValueError(f"Sort column '{column}' must not be nullable")
+            needs_prefix = any(f.column == column and f.op == "prefix" for f in self.filters)
+            needs_tiebreaker = column in self.sort and column != self.tiebreaker
+            for index in indexes:
+                if (
+                    len(index) > position
+                    and {name for name, _ in index[:position]} == set(scope)
+                    and index[position][0] == column
+                    and (not needs_prefix or index[position][1] in PREFIX_COLLATIONS)
+                    and (
+                        not needs_tiebreaker
+                        or (len(index) > position + 1 and index[position + 1][0] == self.tiebreaker)
+                    )
+                ):
+                    self.collations[column] = index[position][1]
+                    break
+            else:
+                expected = [*scope, f'{column} COLLATE "C"' if needs_prefix else column]
+                if needs_tiebreaker:
+                    expected.append(self.tiebreaker)
+                raise UnindexedListingError(self.model.__name__, column, ", ".join(expected))
+
+    def _python_type(self, column: str) -> type:
+        return self.model.__table__.c[column].type.python_type
+
+    def _decode_cursor(self, cursor: str, sort: str) -> tuple[Any, Any]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            cursor_sort, value, key = json.loads(base64.urlsafe_b64decode(padded))
+            if cursor_sort != sort:
+                raise InvalidCursorException("Cursor does not match the requested sort order")
+            return (
+                TypeAdapter(self._python_type(sort.removeprefix("-"))).validate_python(value),
+                TypeAdapter(self._python_type(self.tiebreaker)).validate_python(key),
+            )
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, ValidationError):
+            raise InvalidCursorException() from None
+
+    def dependency(self):
+        """FastAPI dependency parsing the filter, `sort`, `cursor` and `limit` query parameters."""
+        sort_pattern = "^-?(" + "|".join(self.sort) + ")$"
+        parameters = [
+            inspect.Parameter(
+                f"filter_{i}",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Query(None, alias=item.name),
+                annotation=self._python_type(item.column) | None,
+            )
+            for i, item in enumerate(self.filters)
+        ]
+        parameters += [
+            inspect.Parameter(
+                "sort",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Query(self.default_sort, pattern=sort_pattern),
+                annotation=str,
+            ),
+            inspect.Parameter(
+                "cursor", inspect.Parameter.KEYWORD_ONLY, default=Query(None), annotation=str | None
+            ),
+            inspect.Parameter(
+                "limit",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=Query(None, ge=1, le=self.max_limit),
+                annotation=int | None,
+            ),
+        ]
+
+        def list_query(sort: str, cursor: str | None, limit: int | None, **values) -> ListQuery:
+            filters = tuple(
+                (item, values[f"filter_{i}"])
+                for i, item in enumerate(self.filters)
+                if values[f"filter_{i}"] not in (None, "")
+            )
+            after = self._decode_cursor(cursor, sort) if cursor else None
+            return ListQuery(self, filters, sort, after, limit)
+
+        list_query.__signature__ = inspect.Signature(parameters)
+        return list_query
@@ -0,0 +1,127 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+
+class LoopLagMonitor:
+    """
+    Watchdog for code that blocks the event loop.
+
+    A task sleeps for `interval` seconds in a loop and records how late it
+    wakes up in the `event_loop.lag_seconds` summary. A sidecar thread checks
+    the task's heartbeat: when the loop has not come back for `threshold`
+    seconds, the blocking code is still on the loop thread's stack, so the
+    thread captures that stack and logs it with the route of the request
+    being handled (see `LoopMonitorMiddleware`). Stalls are counted per route
+    in `event_loop.stalls`.
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = 0.0
+        self.requests: dict[asyncio.Task, Scope] = {}
+        self._heartbeat = time.monotonic()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = self._loop.create_task(self._measure())
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._stopped.set()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        self._thread.join()
+
+    async def _measure(self):
+        while True:
+            started = time.monotonic()
+            self._heartbeat = started
+            await asyncio.sleep(self.interval)
+            self.lag = max(time.monotonic() - started - self.interval, 0.0)
+            metrics.observe("event_loop.lag_seconds", self.lag)
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(min(self.interval, self.threshold) / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            if blocked > self.threshold and heartbeat != reported:
+                reported = heartbeat
+                self._report(blocked)
+
+    def _active_route(self) -> str:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        scope = self.requests.get(task) if task is not None else None
+        if scope is None:
+            return f"task {task.get_name()}" if task is not None else "no task"
+        route = getattr(scope.get("route"), "path", scope.get("path"))
+        return f"{scope.get('method')} {route}"
+
+    def _report(self, blocked: float):
+        # Runs on the sidecar thread while the loop thread is still blocked.
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "unavailable"
+        route = self._active_route()
+        logger.warning(
+            f"Event loop blocked for more than {blocked + self.interval:.3f}s in {route}:\n{stack}"
+        )
+        self._loop.call_soon_threadsafe(lambda: metrics.inc("event_loop.stalls", route=route))
+
+
+class LoopMonitorMiddleware:
+    """
+    ASGI middleware that tells `LoopLagMonitor` which request each task handles.
+
+    Add it before the other middlewares, so it is the innermost one and runs
+    in the task that executes the endpoint.
+    """
+
+    def __init__(self, app: ASGIApp, monitor: "LoopLagMonitor | None" = None):
+        self.app = app
+        self.monitor = monitor or loop_monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.monitor.requests[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.requests.pop(task, None)
+
+
+loop_monitor = LoopLagMonitor(settings.loop_monitor_interval, settings.loop_monitor_threshold)
+
+metrics.gauge("event_loop.lag", lambda: round(loop_monitor.lag, 6))
@@ -0,0 +1,221 @@
+import gc
+import itertools
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Literal
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import IncorrectIdException, MemoryProfilerStateException
+from app.core.logger import logger
+from app.core.models import Base
+
+
+GroupBy = Literal["module", "lineno"]
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def module_group(module: str) -> str:
+    """Application modules by full name (`app.core.repository`), libraries by package (`sqlalchemy`)."""
+    return module if module == "app" or module.startswith("app.") else module.split(".")[0]
+
+
+class MemoryProfiler:
+    """
+    On-demand `tracemalloc` profiling for leak hunting in a running worker.
+
+    Tracing is off until `start` (it slows allocations down noticeably). While
+    it runs, named snapshots are kept (at most `max_snapshots`, oldest dropped)
+    and can be reported as top allocation sites or diffed against each other,
+    grouped by source line or by module, e.g. `app.core.repository` vs
+    `sqlalchemy` vs `pydantic`. Garbage collector and ORM object statistics
+    work without tracing.
+
+    Every method is CPU bound and holds the GIL; call them from a worker thread.
+    Tracing state and snapshots are guarded by a lock, as HTTP routes and the
+    signal handler run in different executor threads.
+    """
+
+    def __init__(self, frames: int, max_snapshots: int):
+        self.frames = frames
+        self.max_snapshots = max_snapshots
+        self.snapshots: OrderedDict[str, tuple[float, tracemalloc.Snapshot]] = OrderedDict()
+        self._ids = itertools.count(1)
+        self._modules: dict[str, str] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int | None = None) -> dict[str, Any]:
+        with self._lock:
+            if not self.tracing:
+                frames = frames or self.frames
+                tracemalloc.start(frames)
+                logger.info(f"tracemalloc started with {frames} frames")
+            return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        with self._lock:
+            if self.tracing:
+                tracemalloc.stop()
+                logger.info("tracemalloc stopped")
+            self.snapshots.clear()
+            return self.status()
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            current, peak = tracemalloc.get_traced_memory()
+            return {
+                "tracing": self.tracing,
+                "frames": tracemalloc.get_traceback_limit(),
+                "traced_bytes": current,
+                "peak_traced_bytes": peak,
+                "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+                "snapshots": [
+                    {"id": snapshot_id, "taken_at": taken_at}
+                    for snapshot_id, (taken_at, _) in self.snapshots.items()
+                ],
+            }
+
+    def take_snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            if not self.tracing:
+                raise MemoryProfilerStateException("tracemalloc is not running")
+            taken_at = time.time()
+            snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+            snapshot_id = str(next(self._ids))
+            self.snapshots[snapshot_id] = (taken_at, snapshot)
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+        total = sum(stat.size for stat in snapshot.statistics("filename"))
+        return {"id": snapshot_id, "taken_at": taken_at, "traced_bytes": total}
+
+    def _snapshot(self, snapshot_id: str | None) -> tracemalloc.Snapshot:
+        with self._lock:
+            if snapshot_id is None:
+                if not self.snapshots:
+                    raise MemoryProfilerStateException("No snapshot has been taken")
+                return next(reversed(self.snapshots.values()))[1]
+            try:
+                return self.snapshots[snapshot_id][1]
+            except KeyError:
+                raise IncorrectIdException(f"Unknown snapshot '{snapshot_id}'") from None
+
+    def _module(self, filename: str) -> str:
+        if filename not in self._modules:
+            # Modules imported since the last lookup are picked up on a miss.
+            for name, module in list(sys.modules.items()):
+                path = getattr(module, "__file__", None)
+                if path:
+                    self._modules[path] = name
+            self._modules.setdefault(filename, filename)
+        return module_group(self._modules[filename])
+
+    def _by_module(self, stats, diff: bool) -> list[dict[str, Any]]:
+        groups: dict[str, dict[str, int]] = defaultdict(Counter)
+        for stat in stats:
+            group = groups[self._module(stat.traceback[0].filename)]
+            group["size"] += stat.size
+            group["count"] += stat.count
+            if diff:
+                group["size_diff"] += stat.size_diff
+                group["count_diff"] += stat.count_diff
+        key = "size_diff" if diff else "size"
+        rows = [{"module": module, **values} for module, values in groups.items()]
+        return sorted(rows, key=lambda row: abs(row[key]), reverse=True)
+
+    @staticmethod
+    def _by_line(stats, diff: bool) -> list[dict[str, Any]]:
+        rows = []
+        for stat in stats:
+            frame = stat.traceback[0]
+            row = {"site": f"{frame.filename}:{frame.lineno}", "size": stat.size, "count": stat.count}
+            if diff:
+                row.update(size_diff=stat.size_diff, count_diff=stat.count_diff)
+            rows.append(row)
+        return rows
+
+    def top(self, snapshot_id: str | None, group_by: GroupBy, limit: int) -> list[dict[str, Any]]:
+        snapshot = self._snapshot(snapshot_id)
+        if group_by == "module":
+            return self._by_module(snapshot.statistics("filename"), diff=False)[:limit]
+        return self._by_line(snapshot.statistics("lineno")[:limit], diff=False)
+
+    def diff(
+        self, base_id: str, target_id: str | None, group_by: GroupBy, limit: int
+    ) -> list[dict[str, Any]]:
+        base, target = self._snapshot(base_id), self._snapshot(target_id)
+        if group_by == "module":
+            return self._by_module(target.compare_to(base, "filename"), diff=True)[:limit]
+        return self._by_line(target.compare_to(base, "lineno")[:limit], diff=True)
+
+    @staticmethod
+    def gc_stats() -> dict[str, Any]:
+        return {
+            "enabled": gc.isenabled(),
+            "count": gc.get_count(),
+            "threshold": gc.get_threshold(),
+            "generations": gc.get_stats(),
+            "garbage": len(gc.garbage),
+            "tracked_objects": len(gc.get_objects()),
+        }
+
+    @staticmethod
+    def orm_objects() -> dict[str, Any]:
+        """Live instances of every mapped class, and the sessions holding identity maps."""
+        mapped = {mapper.class_ for mapper in Base.registry.mappers}
+        instances: Counter[str] = Counter()
+        sessions = identity_map = 0
+        for obj in gc.get_objects():
+            cls = type(obj)
+            if cls in mapped:
+                instances[cls.__name__] += 1
+            elif isinstance(obj, Session):
+                sessions += 1
+                identity_map += len(obj.identity_map)
+        return {
+            "instances": dict(instances.most_common()),
+            "sessions": sessions,
+            "identity_map_entries": identity_map,
+        }
+
+    def log_report(self, limit: int = 20):
+        """Signal handler body: starts tracing, or snapshots and logs the top modules and growth."""
+        with self._lock:
+            if not self.tracing:
+                self.start()
+                return
+            previous = next(reversed(self.snapshots)) if self.snapshots else None
+            snapshot = self.take_snapshot()
+            lines = [f"Memory snapshot {snapshot['id']}: {snapshot['traced_bytes']} bytes traced"]
+            lines += [f"  {row['module']}: {row['size']} B in {row['count']} blocks"
+                      for row in self.top(snapshot["id"], "module", limit)]
+            if previous is not None:
+                lines.append(f"Growth since snapshot {previous}:")
+                lines += [f"  {row['module']}: {row['size_diff']:+} B, {row['count_diff']:+} blocks"
+                          for row in self.diff(previous, snapshot["id"], "module", limit)]
+        lines.append(f"ORM objects: {self.orm_objects()}")
+        logger.info("\n".join(lines))
+
+    def handle_signal(self):
+        """Runs `log_report` from the signal handler's executor thread; failures are logged."""
+        try:
+            self.log_report()
+        except Exception:
+            logger.exception("Memory report failed")
+
+
+memory_profiler = MemoryProfiler(settings.memory_profiler_frames, settings.memory_profiler_max_snapshots)
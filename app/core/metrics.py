@@ -0,0 +1,66 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass
+class Summary:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "avg": round(self.total / self.count, 6) if self.count else 0.0,
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry.
+
+    Counters and summaries are keyed by name and labels, gauges are callbacks
+    evaluated when a snapshot is taken. The snapshot is exposed by
+    `GET /health/metrics`.
+    """
+
+    def __init__(self):
+        self._counters: dict[str, float] = defaultdict(float)
+        self._summaries: dict[str, Summary] = defaultdict(Summary)
+        self._gauges: dict[str, Callable[[], Any]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict[str, Any]) -> str:
+        if not labels:
+            return name
+        rendered = ",".join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+        return f"{name}{{{rendered}}}"
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        self._counters[self._key(name, labels)] += value
+
+    def observe(self, name: str, value: float, **labels):
+        self._summaries[self._key(name, labels)].observe(value)
+
+    def gauge(self, name: str, callback: Callable[[], Any]):
+        self._gauges[name] = callback
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": dict(self._counters),
+            "summaries": {
+                key: summary.as_dict() for key, summary in self._summaries.items()
+            },
+            "gauges": {name: callback() for name, callback in self._gauges.items()},
+        }
+
+
+metrics = Metrics()
@@ -0,0 +1,69 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.db import engine, replica_engines
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+
+@dataclass
+class StatementCount:
+    statements: int = 0
+
+
+_statement_count: ContextVar[StatementCount | None] = ContextVar("statement_count", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    # SQLAlchemy runs the driver in a greenlet that inherits the request's context.
+    count = _statement_count.get()
+    if count is not None:
+        count.statements += 1
+
+
+def count_statements(async_engine: AsyncEngine):
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count_statement)
+
+
+for _engine in (engine, *replica_engines):
+    count_statements(_engine)
+
+
+class QueryBudgetMiddleware:
+    """
+    ASGI middleware that counts SQL statements executed while handling a request.
+
+    The count is recorded per route template in the `db.statements_per_request`
+    summary. Requests that exceed `request_statement_budget` are logged and
+    counted in `db.statement_budget_exceeded`; they are not rejected.
+    """
+
+    def __init__(self, app: ASGIApp, budget: int = settings.request_statement_budget):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        count = StatementCount()
+        token = _statement_count.set(count)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _statement_count.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            metrics.observe("db.statements_per_request", count.statements, route=path)
+            if self.budget and count.statements > self.budget:
+                metrics.inc("db.statement_budget_exceeded", route=path)
+                logger.warning(
+                    f"{scope['method']} {path} executed {count.statements} SQL statements "
+                    f"(budget {self.budget})"
+                )
@@ -0,0 +1,181 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from fastapi import Request
+
+from app.core.config import settings
+from app.core.exceptions import TooManyRequestsException
+
+
+KeyFunc = Callable[[Request], Awaitable[str | None]]
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets."""
+
+    @abstractmethod
+    async def consume(self, key: str, rate: float, capacity: int, cost: int = 1) -> float:
+        """
+        Takes `cost` tokens from the bucket identified by `key`.
+
+        Args:
+            key (str): The bucket identifier.
+            rate (float): Refill rate in tokens per second.
+            capacity (int): Maximum number of tokens in the bucket.
+            cost (int): Number of tokens to take.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the number of seconds
+            after which the request may be retried.
+        """
+        ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Process-local token buckets kept in an LRU ordered dict.
+
+    Only the `max_keys` most recently used buckets are kept, so a flood of
+    distinct client addresses cannot grow the store without bound.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def consume(self, key: str, rate: float, capacity: int, cost: int = 1) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets shared between replicas through Redis.
+
+    Requires the optional `redis` package.
+    """
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The redis package is required for a shared rate limit backend."
+            ) from e
+        self._redis = Redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def consume(self, key: str, rate: float, capacity: int, cost: int = 1) -> float:
+        result = await self._script(keys=[f"rate_limit:{key}"], args=[rate, capacity, cost])
+        return float(result)
+
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    if settings.rate_limit_backend_url:
+        return RedisRateLimitBackend(settings.rate_limit_backend_url)
+    return InMemoryRateLimitBackend(settings.rate_limit_max_keys)
+
+
+rate_limit_backend = get_rate_limit_backend()
+
+
+async def client_ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
+def form_field(name: str) -> KeyFunc:
+    """Builds a key function returning a field of a form-encoded request body."""
+
+    async def key_func(request: Request) -> str | None:
+        value = (await request.form()).get(name)
+        return value.lower() if isinstance(value, str) else None
+
+    return key_func
+
+
+def json_field(name: str) -> KeyFunc:
+    """Builds a key function returning a field of a JSON request body."""
+
+    async def key_func(request: Request) -> str | None:
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        value = body.get(name) if isinstance(body, dict) else None
+        return value.lower() if isinstance(value, str) else None
+
+    return key_func
+
+
+class RateLimiter:
+    """
+    FastAPI dependency enforcing a token bucket per key.
+
+    The key is produced by `key_func` (client address by default), so one
+    limiter instance may be used per IP, per user or per submitted e-mail.
+    Requests for which no key can be derived are not limited.
+
+    Example:
+        router.include_router(
+            auth_router,
+            dependencies=[Depends(RateLimiter("login", capacity=5, period=60))],
+        )
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        capacity: int,
+        period: float = settings.rate_limit_period,
+        key_func: KeyFunc = client_ip,
+        backend: RateLimitBackend | None = None,
+    ):
+        self.scope = scope
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.key_func = key_func
+        self.backend = backend
+
+    async def __call__(self, request: Request):
+        await self.hit(await self.key_func(request))
+
+    async def hit(self, key: str | None):
+        if not settings.rate_limit_enabled or key is None:
+            return
+        backend = self.backend or rate_limit_backend
+        retry_after = await backend.consume(f"{self.scope}:{key}", self.rate, self.capacity)
+        if retry_after > 0:
+            raise TooManyRequestsException(retry_after)
@@ -0,0 +1,121 @@
+import math
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+@dataclass
+class WriteMarker:
+    """Time of the client's last committed write, as sent with the request and updated by it."""
+
+    last_write: float | None = None
+    wrote: bool = False
+
+
+_write_marker: ContextVar[WriteMarker | None] = ContextVar("write_marker", default=None)
+
+
+class RecentWrites:
+    """
+    Tells whether a principal (user) committed a write recently.
+
+    Their reads are sent to the primary for `window` seconds, which should be
+    at least the replication lag, so a user always sees their own writes. The
+    time of a client's last write travels with the client (see
+    `ReadYourWritesMiddleware`), so this holds whichever worker serves the
+    next request; writes committed on this worker are also remembered for
+    clients that drop the marker.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._writes: OrderedDict[str, float] = OrderedDict()
+
+    def mark(self, principal: str):
+        self._writes.pop(principal, None)
+        self._writes[principal] = time.monotonic()
+        marker = _write_marker.get()
+        if marker is not None:
+            marker.last_write = time.time()
+            marker.wrote = True
+
+    def is_recent(self, principal: str | None) -> bool:
+        marker = _write_marker.get()
+        if marker is not None and marker.last_write is not None:
+            if time.time() - marker.last_write < self.window:
+                return True
+        threshold = time.monotonic() - self.window
+        while self._writes:
+            oldest, written_at = next(iter(self._writes.items()))
+            if written_at >= threshold:
+                break
+            del self._writes[oldest]
+        return principal is not None and principal in self._writes
+
+
+recent_writes = RecentWrites(settings.replica_read_your_writes_window)
+
+
+def _parse_timestamp(value: str | None) -> float | None:
+    try:
+        timestamp = float(value) if value else None
+    except ValueError:
+        return None
+    # A marker from the future would pin the client to the primary.
+    return min(timestamp, time.time()) if timestamp is not None else None
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware that carries the time of a client's last write between workers.
+
+    Responses to requests that committed a write get a `last_write` cookie and
+    an `X-Last-Write` header with the commit time (Unix seconds), valid for
+    the read-your-writes window. Requests bring it back in the cookie, or in
+    `X-Last-Write` for clients without a cookie jar.
+    """
+
+    def __init__(self, app: ASGIApp, window: float = settings.replica_read_your_writes_window):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        cookies = cookie_parser(headers.get("cookie", ""))
+        marker = WriteMarker(
+            last_write=_parse_timestamp(headers.get(LAST_WRITE_HEADER))
+            or _parse_timestamp(cookies.get(LAST_WRITE_COOKIE))
+        )
+
+        async def send_with_marker(message: Message):
+            if message["type"] == "http.response.start" and marker.wrote:
+                response_headers = MutableHeaders(scope=message)
+                value = f"{marker.last_write:.6f}"
+                response_headers.append(LAST_WRITE_HEADER, value)
+                response_headers.append(
+                    "Set-Cookie",
+                    f"{LAST_WRITE_COOKIE}={value}; Max-Age={math.ceil(self.window)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        token = _write_marker.set(marker)
+        try:
+            await self.app(scope, receive, send_with_marker)
+        finally:
+            _write_marker.reset(token)
@@ -1,11 +1,57 @@
 from abc import ABC, abstractmethod
-from typing import Generic, Optional, Type, TypeVar, TypedDict
+from typing import Any, Callable, Generic, Optional, Type, TypeVar, TypedDict
 
-from sqlalchemy import update, delete
+from sqlalchemy import Executable, Integer, any_, bindparam, exists, func, or_, tuple_, update, delete
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from sqlalchemy.future import select
 
+from app.core.exceptions import MissingPartitionKeyError, MissingRepositoryError
+from app.core.listing import ListQuery, prefix_upper_bound
+from app.core.logger import logger
+from app.core.metrics import metrics
+
+
+class StatementCache:
+    """
+    Prebuilt statements keyed by model, operation and filter/value key set.
+
+    Filter and value *keys* come from code, not from user input, so the number
+    of shapes is small and the cache is not bounded. Values are always passed as
+    bound parameters, so a cached statement also keeps its memoized cache key and
+    hits SQLAlchemy's compiled cache without being rebuilt or re-traversed.
+    """
+
+    def __init__(self):
+        self._statements: dict[tuple, Executable] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple, build: Callable[[], Executable]) -> Executable:
+        statement = self._statements.get(key)
+        if statement is None:
+            self.misses += 1
+            statement = self._statements[key] = build()
+        else:
+            self.hits += 1
+        return statement
+
+
+statement_cache = StatementCache()
+
+metrics.gauge("repository.statement_cache.hits", lambda: statement_cache.hits)
+metrics.gauge("repository.statement_cache.misses", lambda: statement_cache.misses)
+
+
+def _filter_signature(filter_by: dict[str, Any]) -> tuple[tuple[str, bool], ...]:
+    # `None` filters compile to `IS NULL`, so they are part of the statement shape.
+    return tuple(sorted((key, value is None) for key, value in filter_by.items()))
+
+
+def _filter_params(filter_by: dict[str, Any]) -> dict[str, Any]:
+    return {f"w_{key}": value for key, value in filter_by.items() if value is not None}
+
 
 class AbstractRepository(ABC):
     @abstractmethod
@@ -14,17 +60,35 @@ class AbstractRepository(ABC):
     @abstractmethod
     async def find_all(self, **filter_by): ...
 
+    @abstractmethod
+    async def find_many(self, ids, **filter_by): ...
+
+    @abstractmethod
+    async def find_page(self, query: ListQuery, **filter_by): ...
+
     @abstractmethod
     async def insert_data(self, **data): ...
 
     @abstractmethod
-    async def update_fields_by_id(self, entity_id, **data): ...
+    async def update_fields_by_id(self, entity_id, data: dict, **filter_by): ...
 
     @abstractmethod
     async def delete(self, **filter_by): ...
    
 
 class SQLAlchemyRepository(AbstractRepository):
+    """
+    Repository on top of an `AsyncSession` owned by the `TransactionManager`.
+
+    Methods only flush; committing (or rolling back) is left to the outermost
+    `async with transaction_manager` block, so several repository and service
+    calls can form one transaction.
+    """
+
+    # Column every query must filter on, e.g. the hash partitioning key of the table.
+    # Guarantees partition pruning: a query without it would scan every partition.
+    partition_key: str | None = None
+
     def __init__(self, model: Type[DeclarativeMeta], session: AsyncSession):
         """
         Initializes the repository with a specific SQLAlchemy model and session.
@@ -38,37 +102,236 @@ class SQLAlchemyRepository(AbstractRepository):
         self.model = model
         self.session = session
 
+    def _check_partition_key(self, filter_by: dict):
+        if self.partition_key is not None and filter_by.get(self.partition_key) is None:
+            error = MissingPartitionKeyError(self.model.__name__, self.partition_key)
+            logger.error(f"{error.detail} Filters: {sorted(filter_by)}")
+            raise error
+
+    def _statement(self, operation: str, signature: tuple, build: Callable[[], Executable]) -> Executable:
+        return statement_cache.get((self.model, operation, signature), build)
+
+    def _select(self):
+        # UPDATE and DELETE do not synchronize the session, so entities loaded
+        # earlier in the transaction are refreshed from the returned rows.
+        return select(self.model).execution_options(populate_existing=True)
+
+    def _where(self, statement, filter_signature: tuple):
+        """Adds `column = :w_<column>` (or `IS NULL`) criteria for every filter key."""
+        for key, is_null in filter_signature:
+            column = getattr(self.model, key)
+            statement = statement.where(
+                column.is_(None) if is_null else column == bindparam(f"w_{key}")
+            )
+        return statement
+
     async def find_one_or_none(self, **filter_by):
-        statement = select(self.model).filter_by(**filter_by)
-        result = await self.session.execute(statement)
+        self._check_partition_key(filter_by)
+        signature = _filter_signature(filter_by)
+        statement = self._statement(
+            "select", signature, lambda: self._where(self._select(), signature)
+        )
+        result = await self.session.execute(statement, _filter_params(filter_by))
         return result.scalar_one_or_none()
 
     async def find_all(self, **filter_by):
-        statement = select(self.model).filter_by(**filter_by)
-        result = await self.session.execute(statement)
+        self._check_partition_key(filter_by)
+        signature = _filter_signature(filter_by)
+        statement = self._statement(
+            "select", signature, lambda: self._where(self._select(), signature)
+        )
+        result = await self.session.execute(statement, _filter_params(filter_by))
+        return result.scalars().all()
+
+    async def find_many(self, ids, **filter_by):
+        """
+        Returns the entities with the given ids matching `filter_by`, in no particular order.
+
+        One `id = ANY(:ids)` statement for any number of ids, so it is prepared once.
+        """
+        self._check_partition_key(filter_by)
+        if not ids:
+            return []
+        signature = _filter_signature(filter_by)
+        statement = self._statement(
+            "many",
+            signature,
+            lambda: self._where(self._select(), signature).where(
+                self.model.id == any_(bindparam("ids", type_=ARRAY(self.model.id.type)))
+            ),
+        )
+        result = await self.session.execute(statement, {**_filter_params(filter_by), "ids": list(ids)})
+        return result.scalars().all()
+
+    def _column(self, query: ListQuery, name: str):
+        # The collation of the index found by `Listing.validate`, so the planner can use it.
+        column = getattr(self.model, name)
+        collation = query.listing.collations.get(name)
+        return column.collate(collation) if collation else column
+
+    async def find_page(self, query: ListQuery, **filter_by):
+        """
+        Returns the rows matching `filter_by` and the whitelisted filters of `query`,
+        ordered by its sort column and tiebreaker, after its cursor. With a `limit`,
+        one extra row is fetched so `ListQuery.page` can tell whether a next page exists.
+        """
+        self._check_partition_key(filter_by)
+        params = _filter_params(filter_by)
+        shape = []
+        for item, value in query.filters:
+            key = f"f_{item.column}_{item.op}"
+            params[key] = value
+            upper = prefix_upper_bound(value) if item.op == "prefix" else None
+            if upper is not None:
+                params[f"{key}_upper"] = upper
+            shape.append((item.column, item.op, upper is not None))
+        if query.after is not None:
+            params["k_value"], params["k_id"] = query.after
+        if query.limit is not None:
+            params["limit"] = query.limit + 1
+        signature = (
+            _filter_signature(filter_by),
+            tuple(shape),
+            tuple(sorted(query.listing.collations.items())),
+            query.listing.tiebreaker,
+            query.sort,
+            query.after is not None,
+            query.limit is not None,
+        )
+
+        def build():
+            statement = self._where(self._select(), signature[0])
+            for name, op, bounded in signature[1]:
+                column = self._column(query, name)
+                value = bindparam(f"f_{name}_{op}")
+                if op == "eq":
+                    statement = statement.where(column == value)
+                elif op == "prefix":
+                    statement = statement.where(column >= value)
+                    if bounded:
+                        statement = statement.where(column < bindparam(f"f_{name}_{op}_upper"))
+                else:
+                    statement = statement.where(
+                        {"gt": column > value, "gte": column >= value,
+                         "lt": column < value, "lte": column <= value}[op]
+                    )
+            sort = self._column(query, query.sort_column)
+            tiebreaker = getattr(self.model, query.listing.tiebreaker)
+            keys = [sort] if query.sort_column == query.listing.tiebreaker else [sort, tiebreaker]
+            if query.after is not None:
+                # Row comparison: matches the `(sort, tiebreaker)` index order.
+                left = tuple_(*keys) if len(keys) > 1 else keys[0]
+                right = (
+                    tuple_(bindparam("k_value"), bindparam("k_id"))
+                    if len(keys) > 1 else bindparam("k_id")
+                )
+                statement = statement.where(left < right if query.descending else left > right)
+            statement = statement.order_by(
+                *(key.desc() if query.descending else key for key in keys)
+            )
+            if query.limit is not None:
+                statement = statement.limit(bindparam("limit", type_=Integer))
+            return statement
+
+        statement = self._statement("page", signature, build)
+        result = await self.session.execute(statement, params)
         return result.scalars().all()
 
     async def insert_data(self, **data: dict):
+        """
+        Adds a new entity to the session without a round trip.
+
+        Pending inserts are flushed together, as one multi-row INSERT ... RETURNING
+        per table, before the next query, savepoint or commit of the transaction;
+        the flush fills in the id and other server defaults of the returned entity.
+        """
+        self._check_partition_key(data)
         entity = self.model(**data)
         self.session.add(entity)
-        await self.session.commit()
-        await self.session.refresh(entity)
         return entity
 
-    async def update_fields_by_id(self, entity_id, **data):
-        statement = (
-        update(self.model)
-        .where(getattr(self.model, "id") == entity_id)
-        .values(**data)
-        .execution_options(synchronize_session="fetch")
-    )
-        result = await self.session.execute(statement)
-        await self.session.commit()
-        return result.rowcount
+    async def update_fields_by_id(self, entity_id, data: dict, **filter_by):
+        """
+        Updates the columns in `data` of the entity with `entity_id`, scoped by `filter_by`
+        (e.g. the owner). Only rows where at least one column actually changes are
+        written. Returns the number of updated rows, 0 for a no-op update, or None if
+        no entity matches; one statement both updates and checks existence. An empty
+        `data` returns 0 without a round trip and without checking existence.
+        """
+        self._check_partition_key(filter_by)
+        if not data:
+            return 0
+        filter_by = {**filter_by, "id": entity_id}
+        signature = (_filter_signature(filter_by), tuple(sorted(data)))
+
+        def build():
+            fields = signature[1]
+            updated = (
+                self._where(update(self.model), signature[0])
+                .where(or_(*(
+                    getattr(self.model, field).is_distinct_from(bindparam(f"v_{field}"))
+                    for field in fields
+                )))
+                .values({field: bindparam(f"v_{field}") for field in fields})
+                .returning(self.model.id)
+                .cte("updated")
+            )
+            # Both parts see the same snapshot: the row exists if it matches the filter.
+            return select(
+                exists(self._where(select(self.model.id), signature[0])).label("found"),
+                select(func.count()).select_from(updated).scalar_subquery().label("updated"),
+            )
+
+        statement = self._statement("update", signature, build)
+        result = await self.session.execute(
+            statement,
+            {**_filter_params(filter_by), **{f"v_{field}": value for field, value in data.items()}},
+        )
+        found, updated_count = result.one()
+        return updated_count if found else None
 
     async def delete(self, **filter_by):
-        statement = delete(self.model).filter_by(**filter_by).execution_options(synchronize_session="fetch")
-        result = await self.session.execute(statement)
-        await self.session.commit()
+        self._check_partition_key(filter_by)
+        signature = _filter_signature(filter_by)
+        statement = self._statement(
+            "delete",
+            signature,
+            lambda: self._where(delete(self.model), signature).execution_options(
+                synchronize_session=False
+            ),
+        )
+        result = await self.session.execute(statement, _filter_params(filter_by))
         return result.rowcount
-    
\ No newline at end of file
+
+
+class RepositoryRegistry:
+    """
+    Models and their repository classes, declared once at startup.
+
+    The `TransactionManager` exposes each registered repository as an attribute
+    named after the model in lower case (`Todo` -> `transaction_manager.todo`)
+    and instantiates it on first access in a transaction.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[Type[DeclarativeMeta], Type[SQLAlchemyRepository]]] = {}
+
+    def register(
+        self,
+        model: Type[DeclarativeMeta],
+        repository_class: Type[SQLAlchemyRepository] = SQLAlchemyRepository,
+    ):
+        self._entries[model.__name__.lower()] = (model, repository_class)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def create(self, name: str, session: AsyncSession) -> SQLAlchemyRepository:
+        try:
+            model, repository_class = self._entries[name]
+        except KeyError:
+            raise MissingRepositoryError(name) from None
+        return repository_class(model, session)
+
+
+repository_registry = RepositoryRegistry()
@@ -1,14 +1,37 @@
+import hashlib
 from enum import Enum
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import  Any, Callable, Coroutine, Generic, Type, TypeAlias, TypeVar
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, params, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from typing import  Any, Awaitable, Callable, Coroutine, Generic, Sequence, Type, TypeAlias, TypeVar
 from pydantic import BaseModel
 
+from app.core.config import settings
+from app.core.deadline import request_deadline
 from app.core.exceptions import DEFAULT_RESPONSES, OpenAPIResponses
+from app.core.idempotency import idempotency_manager
+from app.core.listing import ListQuery, Listing
 from app.core.service import AbstractService, AbstractServiceWithUser
 from app.users.models import User
 
 
 S = TypeVar("S", bound="AbstractService")
+RouteDependencies: TypeAlias = dict[str, Sequence[params.Depends]]
+
+IdempotencyKeyHeader = Header(None, alias="Idempotency-Key", max_length=255)
+
+
+def batch_ids(
+    ids: str = Query(..., pattern=r"^\d+(,\d+)*$", description="Comma separated item ids")
+) -> list[int]:
+    """Parses `?ids=1,2,3`, dropping duplicates; at most `settings.batch_max_ids` ids."""
+    entity_ids = list(dict.fromkeys(int(entity_id) for entity_id in ids.split(",")))
+    if len(entity_ids) > settings.batch_max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.batch_max_ids} ids per request",
+        )
+    return entity_ids
 
 
 class BaseRouter(Generic[S]):
@@ -33,7 +56,19 @@ class BaseRouter(Generic[S]):
       helping organize and label different route groups.
     - responses (dict[int | str, dict[str, Any]]): Predefined response models for standard HTTP status 
       codes (e.g., 401 for Unauthorized, 404 for Not Found), used to document responses in the API.
+    - route_dependencies (dict[str, Sequence[params.Depends]] | None): Extra dependencies for individual
+      routes keyed by the route function name (`get_items`, `get_items_by_ids`, `get_item`,
+      `create_item`, `update_item`, `delete_item`), e.g. a `RateLimiter` for `create_item`.
+    - timeout (float | None): Deadline of every route in seconds (default `settings.request_timeout`);
+      clients may lower or raise it with `X-Request-Timeout` up to `settings.request_timeout_max`.
+    - route_timeouts (dict[str, float] | None): Deadlines of individual routes keyed by the route
+      function name, overriding `timeout`.
+    - listing (Listing | None): Whitelisted filters and sort orders of `get_items` with keyset
+      pagination; validated against the indexes of its model when the router is built.
     """
+    # Columns the service always filters list queries on; indexes used by `listing` start with them.
+    listing_scope: tuple[str, ...] = ()
+
     def __init__(
         self,
         model: Type[BaseModel],
@@ -42,6 +77,10 @@ class BaseRouter(Generic[S]):
         service_dependency: Callable[..., S],
         prefix: str,
         tags: list[str | Enum] | None,
+        route_dependencies: RouteDependencies | None = None,
+        timeout: float | None = None,
+        route_timeouts: dict[str, float] | None = None,
+        listing: Listing | None = None,
     ):
         self.router = APIRouter(prefix=prefix, tags=tags)
         self.model = model
@@ -49,47 +88,178 @@ class BaseRouter(Generic[S]):
         self.model_update = model_update
         self.service_dependency = service_dependency
         self.responses: OpenAPIResponses = DEFAULT_RESPONSES
+        self.route_dependencies: RouteDependencies = route_dependencies or {}
+        self.timeout = timeout
+        self.route_timeouts = route_timeouts or {}
+        self._set_listing(listing)
         self._create_routes()
 
+    def _set_listing(self, listing: Listing | None):
+        self.listing = listing
+        if listing is None:
+            self.list_query_dependency: Callable[..., ListQuery | None] = lambda: None
+        else:
+            listing.validate(self.listing_scope)
+            self.list_query_dependency = listing.dependency()
+
+    def _dependencies(self, route_name: str) -> list[params.Depends]:
+        deadline = request_deadline(self.route_timeouts.get(route_name, self.timeout))
+        return [Depends(deadline), *self.route_dependencies.get(route_name, ())]
+
+    def serialize(self, item: Any) -> Any:
+        """JSON-ready body of an item as the routes return it; also used by `BatchRouter`."""
+        return jsonable_encoder(self.model.model_validate(item, from_attributes=True))
+
+    def _conditional(
+        self, request: Request, content: Any, headers: dict[str, str] | None = None
+    ) -> Response:
+        """
+        JSON response with a weak `ETag` of its body; `304` if it matches `If-None-Match`.
+
+        The tag is weak because the same body is also sent gzip/brotli/zstd encoded.
+        """
+        response = JSONResponse(content=content, headers=headers)
+        etag = f'W/"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+        if_none_match = request.headers.get("if-none-match", "")
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in candidates or etag.removeprefix("W/") in candidates:
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={**(headers or {}), "ETag": etag}
+            )
+        response.headers["ETag"] = etag
+        return response
+
+    def _list_response(self, request: Request, items: Sequence[Any], query: ListQuery | None) -> Response:
+        """List response; the cursor of the next keyset page, if any, is sent in `X-Next-Cursor`."""
+        headers = None
+        if query is not None:
+            items, cursor = query.page(items)
+            if cursor is not None:
+                headers = {"X-Next-Cursor": cursor}
+        return self._conditional(request, [self.serialize(item) for item in items], headers)
+
+    async def _idempotent(
+        self,
+        request: Request,
+        idempotency_key: str | None,
+        item: BaseModel,
+        handler: Callable[[], Awaitable[Any]],
+        user: User | None = None,
+    ) -> Any:
+        """
+        Runs `handler` once per `Idempotency-Key`: retries with the same key and
+        payload replay the stored response, concurrent duplicates wait for the
+        first request.
+        """
+        if idempotency_key is None:
+            return await handler()
+        key = ":".join(
+            (str(user.id) if user else "-", request.method, request.url.path, idempotency_key)
+        )
+        fingerprint = hashlib.sha256(item.model_dump_json().encode()).hexdigest()
+        return await idempotency_manager.execute(key, fingerprint, handler)
+
     def _create_routes(self):
         """
         Sets up the standard CRUD API routes for the router:
-        - GET /: Retrieve a list of all items.
+        - GET /: Retrieve a list of all items, filtered, sorted and paginated by `listing`.
+        - GET /batch?ids=1,2,3: Retrieve several items by their IDs with one query.
         - GET /{item_id}: Retrieve a single item by its ID.
         - POST /: Create a new item.
-        - PUT /{item_id}: Update an existing item by its ID.
+        - PUT/PATCH /{item_id}: Update the fields sent in the request body of an item by its ID.
         - DELETE /{item_id}: Delete an item by its ID.
+
+        GET routes send a weak `ETag` and answer `If-None-Match` revalidations with `304`.
+
+        Updates only write the fields present in the request body (`exclude_unset`), so
+        both PUT and PATCH leave omitted columns untouched; an unknown item gives `404`.
+        An empty body is answered without touching the database, so it is not checked.
+
+        `item_id` uses the `int` path convertor, so static paths added to the router
+        later (e.g. `/stream`) are not shadowed by the item routes.
         """
-        @self.router.get("/", response_model=list[self.model])
-        async def get_items(service: S = Depends(self.service_dependency)): 
-            return await service.get_all()
+        @self.router.get(
+            "/",
+            response_model=list[self.model],
+            dependencies=self._dependencies("get_items"),
+        )
+        async def get_items(
+            request: Request,
+            service: S = Depends(self.service_dependency),
+            query: ListQuery | None = Depends(self.list_query_dependency),
+        ):
+            items = await service.get_all(query) if query else await service.get_all()
+            return self._list_response(request, items, query)
 
-        @self.router.get("/{item_id}", response_model=self.model)
-        async def get_item(item_id: int, service: S = Depends(self.service_dependency)): 
+        @self.router.get(
+            "/batch",
+            response_model=list[self.model],
+            dependencies=self._dependencies("get_items_by_ids"),
+        )
+        async def get_items_by_ids(
+            request: Request,
+            entity_ids: list[int] = Depends(batch_ids),
+            service: S = Depends(self.service_dependency),
+        ):
+            items = await service.get_many(entity_ids)
+            return self._conditional(request, [self.serialize(item) for item in items])
+
+        @self.router.get(
+            "/{item_id:int}",
+            response_model=self.model,
+            dependencies=self._dependencies("get_item"),
+        )
+        async def get_item(
+            request: Request, item_id: int, service: S = Depends(self.service_dependency)
+        ):
             item = await service.get_by_id(item_id)
-            return item
+            return self._conditional(request, self.serialize(item))
 
-        @self.router.post("/", response_model=self.model, responses=self.responses)
+        @self.router.post(
+            "/",
+            response_model=self.model,
+            responses=self.responses,
+            dependencies=self._dependencies("create_item"),
+        )
         async def create_item(
+            request: Request,
             item: self.model_create, # type: ignore
-            service: S = Depends(self.service_dependency)
+            service: S = Depends(self.service_dependency),
+            idempotency_key: str | None = IdempotencyKeyHeader,
             ): 
-            new_item = await service.create(item)
-            return new_item
+            async def handler():
+                return self.serialize(await service.create(item))
+
+            return await self._idempotent(request, idempotency_key, item, handler)
 
-        @self.router.put("/{item_id}", responses=self.responses)
+        @self.router.put(
+            "/{item_id:int}",
+            responses=self.responses,
+            dependencies=self._dependencies("update_item"),
+        )
+        @self.router.patch(
+            "/{item_id:int}",
+            responses=self.responses,
+            dependencies=self._dependencies("update_item"),
+        )
         async def update_item(
+            request: Request,
             item_id: int,
             item: self.model_update, # type: ignore
-            service: S = Depends(self.service_dependency) 
+            service: S = Depends(self.service_dependency),
+            idempotency_key: str | None = IdempotencyKeyHeader,
         ):
-            await service.update(item_id, **item.dict())
-            return {"message": f"Item has been successfully updated"}
+            async def handler():
+                await service.update(item_id, **item.model_dump(exclude_unset=True))
+                return {"message": f"Item has been successfully updated"}
+
+            return await self._idempotent(request, idempotency_key, item, handler)
 
         @self.router.delete(
-            "/{item_id}",
+            "/{item_id:int}",
             responses=self.responses,
             status_code=status.HTTP_204_NO_CONTENT,
+            dependencies=self._dependencies("delete_item"),
         )
         async def delete_item(
             item_id: int,
@@ -103,6 +273,10 @@ class BaseRouter(Generic[S]):
                 )
 
 
+class ItemCount(BaseModel):
+    count: int
+
+
 U = TypeVar("U", bound="AbstractServiceWithUser")
 CurrentUserDependency: TypeAlias = Callable[..., Coroutine[Any, Any, User | None]]
 
@@ -112,6 +286,7 @@ class BaseRouterWithUser(BaseRouter, Generic[U]):
     A specialized router class that extends BaseRouter to include user-dependent CRUD operations.
     This class adds user authentication and authorization to all CRUD operations, ensuring that
     user-specific data is handled properly.
+    It also adds `GET /count`, the number of the user's items from the `entity_count` table.
 
     Type Variables:
     - U (TypeVar): A generic type variable that is bounded by `AbstractServiceWithUser`, representing
@@ -127,7 +302,16 @@ class BaseRouterWithUser(BaseRouter, Generic[U]):
     - tags (list[Union[str, Enum]] | None): Tags for categorizing the routes in API documentation.
     - current_user (User): Dependency that provides the currently authenticated user, allowing access
       to user-specific data and authorization checks.
+    - route_dependencies (dict[str, Sequence[params.Depends]] | None): Extra dependencies for individual
+      routes keyed by the route function name.
+    - timeout (float | None): Deadline of every route in seconds (default `settings.request_timeout`).
+    - route_timeouts (dict[str, float] | None): Deadlines of individual routes keyed by the route
+      function name, overriding `timeout`.
+    - listing (Listing | None): Whitelisted filters and sort orders of `get_items`; its indexes
+      must start with `user_id`.
     """
+    listing_scope = ("user_id",)
+
     def __init__(
         self,
         model: Type[BaseModel],
@@ -136,7 +320,11 @@ class BaseRouterWithUser(BaseRouter, Generic[U]):
         service_dependency: Callable[..., U],
         prefix: str,
         tags: list[str | Enum] | None,
-        current_user: CurrentUserDependency
+        current_user: CurrentUserDependency,
+        route_dependencies: RouteDependencies | None = None,
+        timeout: float | None = None,
+        route_timeouts: dict[str, float] | None = None,
+        listing: Listing | None = None,
         ):
         self.router = APIRouter(prefix=prefix, tags=tags)
         self.model = model
@@ -144,49 +332,115 @@ class BaseRouterWithUser(BaseRouter, Generic[U]):
         self.model_update = model_update
         self.service_dependency = service_dependency
         self.responses: OpenAPIResponses = DEFAULT_RESPONSES
+        self.route_dependencies: RouteDependencies = route_dependencies or {}
+        self.timeout = timeout
+        self.route_timeouts = route_timeouts or {}
+        self._set_listing(listing)
         self._create_routes(current_user)
  
 
     def _create_routes(self, current_user: CurrentUserDependency):
-        @self.router.get("/", response_model=list[self.model])
+        @self.router.get(
+            "/",
+            response_model=list[self.model],
+            dependencies=self._dependencies("get_items"),
+        )
         async def get_items(
+            request: Request,
             service: U = Depends(self.service_dependency),
-            user: User = Depends(current_user)
+            user: User = Depends(current_user),
+            query: ListQuery | None = Depends(self.list_query_dependency),
             ):
-            return await service.get_all(user)
+            items = await service.get_all(user, query) if query else await service.get_all(user)
+            return self._list_response(request, items, query)
+
+        @self.router.get(
+            "/batch",
+            response_model=list[self.model],
+            dependencies=self._dependencies("get_items_by_ids"),
+        )
+        async def get_items_by_ids(
+            request: Request,
+            entity_ids: list[int] = Depends(batch_ids),
+            service: U = Depends(self.service_dependency),
+            user: User = Depends(current_user),
+        ):
+            items = await service.get_many(entity_ids, user)
+            return self._conditional(request, [self.serialize(item) for item in items])
+
+        @self.router.get(
+            "/count",
+            response_model=ItemCount,
+            dependencies=self._dependencies("count_items"),
+        )
+        async def count_items(
+            request: Request,
+            service: U = Depends(self.service_dependency),
+            user: User = Depends(current_user),
+        ):
+            return self._conditional(request, {"count": await service.count(user)})
 
-        @self.router.get("/{item_id}", response_model=self.model)
+        @self.router.get(
+            "/{item_id:int}",
+            response_model=self.model,
+            dependencies=self._dependencies("get_item"),
+        )
         async def get_item(
+            request: Request,
             item_id: int, 
             service: U = Depends(self.service_dependency),
             user: User = Depends(current_user)
         ):
             item = await service.get_by_id(item_id, user)
-            return item
+            return self._conditional(request, self.serialize(item))
 
-        @self.router.post("/", response_model=self.model, responses=self.responses)
+        @self.router.post(
+            "/",
+            response_model=self.model,
+            responses=self.responses,
+            dependencies=self._dependencies("create_item"),
+        )
         async def create_item(
+            request: Request,
             item: self.model_create, # type: ignore
             service: U = Depends(self.service_dependency),
             user: User = Depends(current_user),
+            idempotency_key: str | None = IdempotencyKeyHeader,
         ):
-            new_item = await service.create(item, user)
-            return new_item
+            async def handler():
+                return self.serialize(await service.create(item, user))
 
-        @self.router.put("/{item_id}", responses=self.responses)
+            return await self._idempotent(request, idempotency_key, item, handler, user)
+
+        @self.router.put(
+            "/{item_id:int}",
+            responses=self.responses,
+            dependencies=self._dependencies("update_item"),
+        )
+        @self.router.patch(
+            "/{item_id:int}",
+            responses=self.responses,
+            dependencies=self._dependencies("update_item"),
+        )
         async def update_item(
+            request: Request,
             item_id: int,
             item: self.model_update, # type: ignore
             service: U = Depends(self.service_dependency),
             user: User = Depends(current_user),
+            idempotency_key: str | None = IdempotencyKeyHeader,
         ):
-            await service.update(item_id, user, **item.dict())
-            return {"message": f"Item has been successfully updated"}
+            async def handler():
+                await service.update(item_id, user, **item.model_dump(exclude_unset=True))
+                return {"message": f"Item has been successfully updated"}
+
+            return await self._idempotent(request, idempotency_key, item, handler, user)
 
         @self.router.delete(
-            "/{item_id}",
+            "/{item_id:int}",
             responses=self.responses,
             status_code=status.HTTP_204_NO_CONTENT,
+            dependencies=self._dependencies("delete_item"),
         )
         async def delete_item(
             item_id: int,
@@ -0,0 +1,37 @@
+from typing import Any
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class PathScopedMiddleware:
+    """
+    Applies a middleware only to requests under the given path prefixes.
+
+    Other requests go straight to the wrapped app and pay nothing for it, e.g.
+    the cookie session needed by the OAuth redirect flow is not parsed, verified
+    and re-signed on every bearer-token API call:
+
+        app.add_middleware(
+            PathScopedMiddleware,
+            middleware=SessionMiddleware,
+            prefixes=["/v1/auth/google"],
+            secret_key=settings.secret,
+        )
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        middleware: type,
+        prefixes: list[str],
+        **options: Any,
+    ):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.scoped_app = middleware(app, **options)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] in ("http", "websocket") and scope["path"].startswith(self.prefixes):
+            await self.scoped_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
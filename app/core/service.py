@@ -1,10 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Generic, Optional, Type, TypeVar, cast, final
+from typing import TYPE_CHECKING, Any, Generic, Hashable, Sequence, Type, TypeVar, cast, final
 
 from pydantic import BaseModel
 
+import app.core.counters  # noqa: F401 (registers EntityCountRepository)
+from app.core.entity_cache import EntityCache
+from app.core.listing import ListQuery
 from app.core.repository import AbstractRepository
-from app.core.transaction_manager import ITransactionManager
+from app.core.transaction_manager import ITransactionManager, transactional
 from app.core.exceptions import IncorrectIdException, MissingRepositoryError
 from app.users.models import User
 
@@ -22,6 +25,11 @@ class AbstractService(ABC, Generic[T]):
     interactions through a transaction manager.
     """
 
+    # Optional per-worker cache of entities read by `get_many`, keyed by `(scope, id)`.
+    entity_cache: EntityCache | None = None
+    # Schema the entities are cached as; required with `entity_cache`.
+    read_model: Type[BaseModel] | None = None
+
     def __init__(
         self,
         entity_type: Type[T],
@@ -31,23 +39,22 @@ class AbstractService(ABC, Generic[T]):
         self.entity_type = entity_type
         self.transaction_manager = transaction_manager
         self.user_manager = user_manager
-        self._repository: Optional[AbstractRepository] = None
 
     @final
     @property
     def repository(self) -> AbstractRepository:
-        if self._repository is None:
-            try:
-                self._repository = getattr(
-                    self.transaction_manager, self.entity_type.__name__.lower()
-                )
-            except AttributeError as e:
-                raise MissingRepositoryError(self.entity_type.__name__.lower()) from e
-        return cast(AbstractRepository, self._repository)
+        # Resolved on every access: each transaction (primary or replica) has its own repositories.
+        try:
+            repository = getattr(
+                self.transaction_manager, self.entity_type.__name__.lower()
+            )
+        except AttributeError as e:
+            raise MissingRepositoryError(self.entity_type.__name__.lower()) from e
+        return cast(AbstractRepository, repository)
 
     @abstractmethod
-    async def get_all(self) -> list[T] | None:
-        """Fetch all entities from the repository."""
+    async def get_all(self, query: ListQuery | None = None) -> list[T] | None:
+        """Fetch all entities from the repository, filtered, sorted and paginated by `query`."""
         pass
 
     @abstractmethod
@@ -55,6 +62,11 @@ class AbstractService(ABC, Generic[T]):
         """Fetch a single entity by its ID."""
         pass
 
+    @abstractmethod
+    async def get_many(self, entity_ids: Sequence[int]) -> list[T]:
+        """Fetch the entities with the given IDs in their order, skipping unknown IDs."""
+        pass
+
     @abstractmethod
     async def create(self, entity: T) -> T:
         """Create a new entity in the repository."""
@@ -67,8 +79,45 @@ class AbstractService(ABC, Generic[T]):
 
     @abstractmethod
     async def update(self, entity_id: int, **data) -> int:
-        """Update fields of an entity by its ID."""
+        """
+        Update fields of an entity by its ID; raises `IncorrectIdException` if it does not exist.
+        An empty `data` is a no-op that does not touch the database, so existence is not checked.
+        """
         pass
+
+    async def _get_many(self, entity_ids: Sequence[int], scope: Hashable, **filter_by) -> list[Any]:
+        """
+        Serves the ids found in `entity_cache` and reads only the misses, with one
+        query. With a cache, entities are returned as `read_model` instances, which
+        keep no session state. Call from a `@transactional(read_only=True)` method.
+        """
+        cache = self.entity_cache
+        found = {}
+        if cache is not None:
+            cached = cache.get_many((scope, entity_id) for entity_id in entity_ids)
+            found = {entity_id: entity for (_, entity_id), entity in cached.items()}
+        missing = [entity_id for entity_id in entity_ids if entity_id not in found]
+        if missing:
+            generation = cache.generation if cache is not None else 0
+            async with self.transaction_manager:
+                entities = await self.repository.find_many(missing, **filter_by)
+            fetched = {entity.id: entity for entity in entities}
+            if cache is not None:
+                fetched = {
+                    entity_id: self.read_model.model_validate(entity, from_attributes=True)
+                    for entity_id, entity in fetched.items()
+                }
+                cache.put_many(
+                    {(scope, entity_id): entity for entity_id, entity in fetched.items()}, generation
+                )
+            found.update(fetched)
+        return [found[entity_id] for entity_id in entity_ids if entity_id in found]
+
+    def _invalidate(self, scope: Hashable, entity_id: int):
+        """Drops the entity from `entity_cache` once the current transaction commits."""
+        cache = self.entity_cache
+        if cache is not None:
+            self.transaction_manager.after_commit(lambda: cache.invalidate((scope, entity_id)))
     
     
 class AbstractServiceWithUser(AbstractService, Generic[T]):
@@ -78,13 +127,41 @@ class AbstractServiceWithUser(AbstractService, Generic[T]):
     interactions through a transaction manager.
     """
 
+    # Per-worker cache of `count` results keyed by user id.
+    count_cache: EntityCache | None = None
+
+    async def _count(self, entity: str, user: User) -> int:
+        """
+        Reads the user's counter from `entity_count` (kept up to date by triggers),
+        served from `count_cache` when cached. Call from a `@transactional(read_only=True)` method.
+        """
+        cache = self.count_cache
+        if cache is not None:
+            cached = cache.get_many([user.id])
+            if user.id in cached:
+                return cached[user.id]
+        generation = cache.generation if cache is not None else 0
+        async with self.transaction_manager:
+            count = await self.transaction_manager.entitycount.get_count(entity, user.id)
+        if cache is not None:
+            cache.put_many({user.id: count}, generation)
+        return count
+
+    def _invalidate_count(self, user: User):
+        """Drops the user's cached count once the current transaction commits."""
+        cache = self.count_cache
+        if cache is not None:
+            self.transaction_manager.after_commit(lambda: cache.invalidate(user.id))
+
     @abstractmethod
-    async def get_all(self, user: User) -> list[T] | None:
+    async def get_all(self, user: User, query: ListQuery | None = None) -> list[T] | None:
         """
         Fetch all entities from the repository for the specified user.
         
         Args:
             user (User): The user for whom to fetch entities.
+            query (ListQuery | None): Filters, sort order and keyset page from the list route;
+                with a `limit` one extra entity is returned (see `ListQuery.page`).
 
         Returns:
             list[T] | None: A list of entities or None if not found.
@@ -105,6 +182,35 @@ class AbstractServiceWithUser(AbstractService, Generic[T]):
         """
         pass
 
+    @abstractmethod
+    async def get_many(self, entity_ids: Sequence[int], user: User) -> list[T]:
+        """
+        Fetch the entities with the given IDs for the specified user.
+
+        Args:
+            entity_ids (Sequence[int]): The IDs of the entities to fetch.
+            user (User): The user for whom to fetch the entities.
+
+        Returns:
+            list[T]: The entities in the order of `entity_ids`; unknown IDs and
+                entities of other users are left out.
+        """
+        pass
+
+    @abstractmethod
+    async def count(self, user: User) -> int:
+        """
+        Count the entities of the specified user.
+
+        Args:
+            user (User): The user whose entities to count.
+
+        Returns:
+            int: The number of entities, possibly up to `count_cache` TTL seconds old
+                for writes made on other workers.
+        """
+        pass
+
     @abstractmethod
     async def create(self, entity: T, user: User) -> T:
         """
@@ -141,10 +247,15 @@ class AbstractServiceWithUser(AbstractService, Generic[T]):
         Args:
             entity_id (int): The ID of the entity to update.
             user (User): The user making the update.
-            **data: The fields to update in the entity.
+            **data: The fields to update in the entity, only those set by the client
+                (`exclude_unset`); an empty `data` is a no-op that does not touch the
+                database, so existence is not checked.
 
         Returns:
-            int: The number of updated entities (0 or 1).
+            int: The number of updated entities (0 or 1), 0 if nothing changed.
+
+        Raises:
+            IncorrectIdException: If the user has no entity with this ID.
         """
         pass
 
@@ -156,10 +267,14 @@ class BaseService(AbstractService, Generic[T]):
     in a transaction.
     """
 
-    async def get_all(self) -> list[T] | None:
+    @transactional(read_only=True)
+    async def get_all(self, query: ListQuery | None = None) -> list[T] | None:
         async with self.transaction_manager:
-            return await self.repository.find_all()
+            if query is None:
+                return await self.repository.find_all()
+            return await self.repository.find_page(query)
 
+    @transactional(read_only=True)
     async def get_by_id(self, entity_id) -> T | None:
         async with self.transaction_manager:
             entity = await self.repository.find_one_or_none(id=entity_id)
@@ -167,14 +282,29 @@ class BaseService(AbstractService, Generic[T]):
                 raise IncorrectIdException(f"Incorrect {self.entity_type.__name__} id")
             return entity
 
+    @transactional(read_only=True)
+    async def get_many(self, entity_ids: Sequence[int]) -> list[T]:
+        return await self._get_many(entity_ids, None)
+
+    @transactional()
     async def create(self, entity: T) -> T | None:
         async with self.transaction_manager:
             return await self.repository.insert_data(**entity.model_dump())
 
+    @transactional(idempotent=True)
     async def delete(self, entity_id: int) -> int | None:
         async with self.transaction_manager:
-            return await self.repository.delete(id=entity_id)
+            deleted_count = await self.repository.delete(id=entity_id)
+            if deleted_count:
+                self._invalidate(None, entity_id)
+            return deleted_count
 
+    @transactional(idempotent=True)
     async def update(self, entity_id, **data) -> int | None:
         async with self.transaction_manager:
-            return await self.repository.update_fields_by_id(entity_id, **data)
+            updated_count = await self.repository.update_fields_by_id(entity_id, data)
+            if updated_count is None:
+                raise IncorrectIdException(f"Incorrect {self.entity_type.__name__} id")
+            if updated_count:
+                self._invalidate(None, entity_id)
+            return updated_count
@@ -1,12 +1,169 @@
+import asyncio
+import functools
+import itertools
+import json
+import math
+import random
 from abc import ABC, abstractmethod
-from typing import Annotated
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Annotated, Any, AsyncIterator, Awaitable, Callable, TypeVar
 
 from fastapi import Depends
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio.session import async_sessionmaker, AsyncSession
 
-from app.core.db import async_session_maker
-from app.todo.models import Todo
-from app.todo.repository import TodoRepository
+from app.core.config import settings
+from app.core.db import async_session_maker, get_replica_session_maker
+from app.core.deadline import remaining_time
+from app.core.exceptions import DeadlineExceededException, TransactionRetryExhaustedException
+from app.core.metrics import metrics
+from app.core.read_your_writes import recent_writes
+from app.core.repository import SQLAlchemyRepository, repository_registry
+from app.users.models import User
+
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+@dataclass(frozen=True)
+class TransactionOptions:
+    """Per-method transaction settings declared with `@transactional`."""
+
+    read_only: bool = False
+    principal: str | None = None
+    isolation_level: str | None = None
+
+
+_transaction_options: ContextVar[TransactionOptions] = ContextVar(
+    "transaction_options", default=TransactionOptions()
+)
+
+
+QUERY_CANCELED = "57014"
+
+RETRYABLE_SQLSTATES = {
+    "40001": "serialization_failure",
+    "40P01": "deadlock_detected",
+}
+
+
+def _retry_reason(error: DBAPIError) -> str | None:
+    sqlstate = getattr(error.orig, "sqlstate", None) or ""
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return RETRYABLE_SQLSTATES[sqlstate]
+    if error.connection_invalidated or sqlstate.startswith("08"):
+        return "connection_error"
+    return None
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    ceiling = min(
+        settings.transaction_retry_max_delay,
+        settings.transaction_retry_base_delay * 2**attempt,
+    )
+    return random.uniform(0, ceiling)
+
+
+async def _run_with_retries(
+    method: Callable[..., Awaitable[Any]],
+    service: Any,
+    args: tuple,
+    kwargs: dict,
+    max_retries: int,
+    safe_on_connection_error: bool,
+) -> Any:
+    for attempt in itertools.count():
+        try:
+            return await method(service, *args, **kwargs)
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) == QUERY_CANCELED:
+                # `statement_timeout` derived from the request deadline fired.
+                raise TimeoutError() from e
+            reason = _retry_reason(e)
+            if reason is None or (reason == "connection_error" and not safe_on_connection_error):
+                raise
+            if attempt >= max_retries:
+                metrics.inc(
+                    "db.transaction_retries_exhausted", method=method.__qualname__, reason=reason
+                )
+                raise TransactionRetryExhaustedException() from e
+            metrics.inc("db.transaction_retries", method=method.__qualname__, reason=reason)
+            await asyncio.sleep(_backoff(attempt))
+
+
+def transactional(
+    read_only: bool = False,
+    isolation_level: str | None = None,
+    retries: int | None = None,
+    idempotent: bool | None = None,
+) -> Callable[[F], F]:
+    """
+    Declares how transactions opened by a service method are routed and retried.
+
+    Methods marked `read_only=True` run on a replica when replicas are
+    configured and the user has not written recently; everything else runs on
+    the primary. The user is taken from the first `User` argument of the call.
+
+    `isolation_level` (e.g. `"REPEATABLE READ"`, `"SERIALIZABLE"`) applies to
+    the transaction the method opens; a method joining an open transaction
+    runs with the level of that transaction.
+
+    A method that opens the transaction is re-executed up to `retries` times
+    (default `TRANSACTION_RETRIES`) with jittered exponential backoff when it
+    fails with a serialization failure or deadlock: the transaction was rolled
+    back, so running it again is safe. After a lost connection the commit may
+    or may not have happened, so it is only retried for `idempotent` methods
+    (by default the read-only ones). Methods joining an outer transaction are
+    never retried on their own; the outermost method retries the whole unit.
+
+    When the request has a deadline (see `app.core.deadline`), the method and
+    its retries are cancelled once it passes, the transaction is rolled back
+    and `504` is returned.
+
+    Example:
+        @transactional(read_only=True)
+        async def get_all(self, user: User): ...
+
+        @transactional(isolation_level="REPEATABLE READ", idempotent=True)
+        async def update(self, entity_id, user: User, **data): ...
+    """
+    max_retries = settings.transaction_retries if retries is None else retries
+    safe_on_connection_error = read_only if idempotent is None else idempotent
+
+    def decorator(method: F) -> F:
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if self.transaction_manager.active:
+                return await method(self, *args, **kwargs)
+
+            user = next(
+                (arg for arg in (*args, *kwargs.values()) if isinstance(arg, User)), None
+            )
+            options = TransactionOptions(
+                read_only=read_only,
+                principal=str(user.id) if user else None,
+                isolation_level=isolation_level,
+            )
+            token = _transaction_options.set(options)
+            try:
+                async with asyncio.timeout(remaining_time()):
+                    return await _run_with_retries(
+                        method, self, args, kwargs, max_retries, safe_on_connection_error
+                    )
+            except TimeoutError as e:
+                metrics.inc("db.deadline_exceeded", method=method.__qualname__)
+                raise DeadlineExceededException() from e
+            finally:
+                _transaction_options.reset(token)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
 
 class ITransactionManager(ABC):
     """Interface for implementing the UOW pattern
@@ -26,41 +183,231 @@ class ITransactionManager(ABC):
 
     @abstractmethod
     async def rollback(self): ...
+
+    @abstractmethod
+    async def flush(self): ...
+
+    @abstractmethod
+    def publish(self, channel: str, payload: dict | Callable[[], dict]): ...
+
+    @abstractmethod
+    def after_commit(self, callback: Callable[[], None]): ...
+
+    @abstractmethod
+    def savepoint(self): ...
+
+    @property
+    @abstractmethod
+    def active(self) -> bool:
+        """Whether a transaction is currently open on this manager."""
+        ...
     
 
 class TransactionManager(ITransactionManager):
     """Implementation of the interface for working with transactions"""
 
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, replica_session_factory=None):
         self.session_factory: async_sessionmaker[AsyncSession] = session_factory
+        self.replica_session_factory: async_sessionmaker[AsyncSession] | None = (
+            replica_session_factory
+        )
+        self._depth = 0
+        self._session: AsyncSession | None = None
+        self._repositories: dict[str, SQLAlchemyRepository] = {}
 
     async def __aenter__(self):
         """
         Asynchronous context manager entry point.
 
-        This method initializes a new session and creates repositories for each model.
-        Each repository is assigned as an attribute of the `TransactionManager` instance.
-        The attribute names should correspond to the name of the model in lower case.
+        Entering does not touch the database. Repositories of the models in
+        `repository_registry` are available as attributes named after the model
+        in lower case (`Todo` -> `self.todo`) and are created on first access
+        in the transaction; the session is created together with the first
+        repository and takes a pooled connection only when it first executes.
+
+        The session is opened on a replica when the calling service method is
+        declared `@transactional(read_only=True)`, a replica is configured and
+        the user has not written recently; otherwise on the primary. If the
+        request has a deadline, the transaction gets `SET LOCAL statement_timeout`
+        for the remaining time when it begins.
 
-        For example:
-        `TodoRepository` should be assigned to `self.todo`:
-        self.todo = TodoRepository(self.session)
+        Entering is re-entrant: a nested `async with` joins the transaction that
+        is already open, and only the outermost exit commits. A handler that
+        calls several service methods can therefore run them in one transaction:
 
-        This naming convention ensures consistency when accessing repositories during transactions.
+            async with service.transaction_manager:
+                await service.create(first, user)
+                await service.create(second, user)
 
         Returns:
-            self: The instance of `TransactionManager` with initialized repositories.
+            self: The instance of `TransactionManager`.
         """
-        self.session: AsyncSession = self.session_factory()
-        self.todo = TodoRepository(Todo, self.session)
+        options = _transaction_options.get()
+        if self._depth:
+            if self.on_replica and not options.read_only:
+                raise RuntimeError("Cannot write inside a read-only transaction on a replica")
+            self._join(options)
+            self._depth += 1
+            return self
+
+        if (remaining := remaining_time()) is not None and remaining <= 0:
+            raise DeadlineExceededException()
+        self.options = options
+        self.on_replica = (
+            self.options.read_only
+            and self.replica_session_factory is not None
+            and not recent_writes.is_recent(self.options.principal)
+        )
+        self.events: list[tuple[str, dict]] = []
+        self.callbacks: list[Callable[[], None]] = []
+        self.writers: set[str] = set()
+        self.rollback_only = False
+        self._join(options)
+        self._depth = 1
         return self
 
-    async def __aexit__(self, exc_type, exc, tb):
-        if exc is None:
-            await self.session.commit()
+    def __getattr__(self, name: str) -> SQLAlchemyRepository:
+        # Only called for attributes that are not set, i.e. repository names.
+        if name.startswith("_") or name not in repository_registry:
+            raise AttributeError(name)
+        if not self._depth:
+            raise RuntimeError(f"Repository '{name}' used outside of a transaction")
+        repository = self._repositories.get(name)
+        if repository is None:
+            repository = self._repositories[name] = repository_registry.create(name, self.session)
+        return repository
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._open_session()
+        return self._session
+
+    def _open_session(self) -> AsyncSession:
+        session_factory = (
+            self.replica_session_factory if self.on_replica else self.session_factory
+        )
+        if self.options.isolation_level is None:
+            session = session_factory()
         else:
-            await self.session.rollback()
-        await self.session.close()
+            bind = session_factory.kw["bind"].execution_options(
+                isolation_level=self.options.isolation_level
+            )
+            session = session_factory(bind=bind)
+        event.listen(session.sync_session, "after_begin", self._on_begin)
+        return session
+
+    @staticmethod
+    def _on_begin(session, transaction, connection):
+        remaining = remaining_time()
+        if remaining is None:
+            return
+        if remaining <= 0:
+            raise DeadlineExceededException()
+        # SET does not accept bind parameters; the value is an integer.
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {math.ceil(remaining * 1000)}")
+
+    @property
+    def active(self) -> bool:
+        return self._depth > 0
+
+    def _join(self, options: TransactionOptions):
+        if not options.read_only and options.principal is not None:
+            self.writers.add(options.principal)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._depth -= 1
+        if exc is not None:
+            self.rollback_only = True
+        if self._depth:
+            return
+
+        session, self._session = self._session, None
+        self._repositories.clear()
+        if session is None:
+            return
+        try:
+            if self.rollback_only:
+                self.events.clear()
+                self.callbacks.clear()
+                await session.rollback()
+                if exc is None:
+                    raise RuntimeError(
+                        "Transaction rolled back: a nested block failed and its error was suppressed"
+                    )
+                return
+            await self._notify(session)
+            await session.commit()
+            for principal in self.writers:
+                recent_writes.mark(principal)
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+        finally:
+            await session.close()
+
+    def publish(self, channel: str, payload: dict | Callable[[], dict]):
+        """
+        Queues a change event to be sent with `NOTIFY` when the transaction commits.
+
+        Postgres delivers notifications only after a successful commit, so
+        listeners never observe events of rolled back transactions. A callable
+        payload is built after the final flush, e.g. to include the id of an
+        entity inserted in this transaction.
+        """
+        self.events.append((channel, payload))
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Runs `callback` after the outermost transaction commits; dropped on rollback."""
+        self.callbacks.append(callback)
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator[None]:
+        """
+        Savepoint in the open transaction. If the block fails, only its writes,
+        events and callbacks are rolled back and the transaction can still
+        commit; the error propagates to the caller.
+
+            async with transaction_manager:
+                for operation in operations:
+                    try:
+                        async with transaction_manager.savepoint():
+                            await run(operation)
+                    except AppException:
+                        ...
+        """
+        if not self._depth:
+            raise RuntimeError("Savepoint used outside of a transaction")
+        events, callbacks, rollback_only = len(self.events), len(self.callbacks), self.rollback_only
+        try:
+            async with self.session.begin_nested():
+                yield
+        except BaseException:
+            del self.events[events:]
+            del self.callbacks[callbacks:]
+            self.rollback_only = rollback_only
+            raise
+
+    async def _notify(self, session: AsyncSession):
+        if self.events:
+            await session.flush()
+        for channel, payload in self.events:
+            if callable(payload):
+                payload = payload()
+            await session.execute(
+                select(func.pg_notify(channel, json.dumps(payload, default=str)))
+            )
+        self.events.clear()
+
+    async def flush(self):
+        """
+        Sends pending inserts now, filling in their ids and server defaults.
+
+        Repositories do not flush: inserts are sent together before the next
+        query, savepoint or commit. Call this only when an id is needed earlier.
+        """
+        if self._session is not None:
+            await self._session.flush()
 
     async def commit(self):
         await self.session.commit()
@@ -69,12 +416,14 @@ class TransactionManager(ITransactionManager):
         await self.session.rollback()
 
 
-def get_transaction_manager(session_factory) -> ITransactionManager:
-    return TransactionManager(session_factory)
+def get_transaction_manager(session_factory, replica_session_factory=None) -> ITransactionManager:
+    return TransactionManager(session_factory, replica_session_factory)
 
 
 # return a Unit of work instance for working with Session
 TManagerDep = Annotated[
     ITransactionManager,
-    Depends(lambda: get_transaction_manager(async_session_maker)),
+    Depends(
+        lambda: get_transaction_manager(async_session_maker, get_replica_session_maker())
+    ),
 ]
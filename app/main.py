@@ -1,24 +1,80 @@
+import asyncio
+import signal
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from app.api.health import router as health_router
 from app.api.v1 import routers_v1
+from app.core.admission import AdmissionControlMiddleware
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
 from app.core.exceptions import ERROR_MESSAGES
 from app.core.logger import logger
+from app.core.loop_monitor import LoopMonitorMiddleware, loop_monitor
+from app.core.memory import memory_profiler
+from app.core.query_budget import QueryBudgetMiddleware
+from app.core.read_your_writes import ReadYourWritesMiddleware
+from app.core.scoped_middleware import PathScopedMiddleware
+from app.todo.service import todo_change_feed
+from app.users.oauth_config import google_metadata_cache
+from app.users.token import revocation_list
 from starlette.middleware.sessions import SessionMiddleware
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    revocation_list.start()
+    google_metadata_cache.start()
+    if settings.memory_profiler_signal:
+        # First signal starts tracing, each next one logs a report with the growth since the previous.
+        loop = asyncio.get_running_loop()
+        memory_signal = getattr(signal, settings.memory_profiler_signal)
+        loop.add_signal_handler(memory_signal, loop.run_in_executor, None, memory_profiler.handle_signal)
+    yield
+    if settings.memory_profiler_signal:
+        loop.remove_signal_handler(memory_signal)
+    await google_metadata_cache.stop()
+    await revocation_list.stop()
+    await todo_change_feed.close()
+    await loop_monitor.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+if settings.loop_monitor_enabled:
+    app.add_middleware(LoopMonitorMiddleware)
+
+app.add_middleware(QueryBudgetMiddleware)
+
+if settings.database_replica_urls:
+    app.add_middleware(ReadYourWritesMiddleware)
 
-app.add_middleware(SessionMiddleware, secret_key=settings.secret)
+if settings.admission_enabled:
+    app.add_middleware(AdmissionControlMiddleware)
+
+if settings.compression_enabled:
+    app.add_middleware(CompressionMiddleware)
+
+# Only the Google OAuth redirect flow keeps state in the cookie session.
+app.add_middleware(
+    PathScopedMiddleware,
+    middleware=SessionMiddleware,
+    prefixes=settings.session_paths,
+    secret_key=settings.secret,
+)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["Content-Type", "Authorization", "Idempotency-Key", "X-Request-Timeout", "X-Last-Write"],
+    expose_headers=["X-Next-Cursor", "X-Last-Write"],
 )
 
 @app.middleware("http")
@@ -27,6 +83,8 @@ async def log_requests(request: Request, call_next):
     response = await call_next(request)
     return response
 
+app.include_router(health_router)
+
 for router in routers_v1:
     app.include_router(router, prefix="/v1")
  
@@ -36,4 +94,5 @@ async def custom_http_exception_handler(request, exc):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": translated_detail},
+        headers=getattr(exc, "headers", None),
     )
@@ -1,13 +1,59 @@
-from sqlalchemy import UUID, Column, ForeignKey, Integer, String
+from sqlalchemy import (
+   UUID,
+   BigInteger,
+   Column,
+   DateTime,
+   ForeignKey,
+   Index,
+   Integer,
+   PrimaryKeyConstraint,
+   Sequence,
+   String,
+   func,
+   text,
+)
 from sqlalchemy.orm import relationship
 from app.core.models import Base
 
 
+# Shared by todos and their tombstones: every insert, update and delete
+# takes the next value, so `version > since` yields exactly the changes.
+# The triggers lock the owner until commit before taking it (migration
+# b41e7d9c2a05), so a user's versions commit in increasing order.
+todo_version_seq = Sequence("todo_version_seq", metadata=Base.metadata)
+
+
 class Todo(Base):
    __tablename__ = "todo"
+   # Hash partitioned by `user_id`, so the partition key leads the primary key.
+   __table_args__ = (
+      PrimaryKeyConstraint("user_id", "id", name="todo_pkey"),
+      Index("ix_todo_user_id_version", "user_id", "version"),
+   )
    
-   id = Column(Integer, primary_key=True, index=True)
+   id = Column(Integer, autoincrement=True, index=True)
    title = Column(String, nullable=False)
    description = Column(String, nullable=True)
    user_id = Column(UUID(as_uuid=True), ForeignKey("user.id"), nullable=False)
-   user = relationship("User", back_populates="todo")
\ No newline at end of file
+   # Assigned by the `todo_version` trigger on insert and update.
+   version = Column(BigInteger, nullable=False, server_default=text("0"))
+   updated_at = Column(
+      DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+   )
+   user = relationship("User", back_populates="todo")
+
+
+# Byte order collation: serves both `ORDER BY title, id` pages and title prefix ranges.
+Index("ix_todo_user_id_title", Todo.user_id, Todo.title.collate("C"), Todo.id)
+
+
+class TodoTombstone(Base):
+   """Deleted todo, written by the `todo_tombstone` trigger for delta sync."""
+
+   __tablename__ = "todo_tombstone"
+   __table_args__ = (Index("ix_todo_tombstone_user_id_version", "user_id", "version"),)
+
+   id = Column(Integer, primary_key=True)
+   user_id = Column(UUID(as_uuid=True), nullable=False)
+   version = Column(BigInteger, nullable=False)
+   deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
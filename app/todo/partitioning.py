@@ -0,0 +1,92 @@
+"""
+Online copy of `todo` into the hash partitioned `todo_partitioned` table.
+
+Run between migrations 2f53925a19ac (creates the partitioned table and the
+mirroring trigger) and fcd46b7cf48b (swaps the tables):
+
+    alembic upgrade 2f53925a19ac
+    python -m app.todo.partitioning copy --batch-size 5000 --pause 0.05
+    alembic upgrade head
+
+Rows are copied in primary key order in short transactions. Source rows are
+locked `FOR SHARE` while a batch is copied, so a concurrent delete waits for
+the batch and is then mirrored by the trigger; rows already written by the
+trigger are newer and are left untouched.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.db import engine
+from app.core.logger import logger
+
+
+COLUMNS = "id, title, description, user_id, version, updated_at"
+
+COPY_BATCH = text(
+    f"""
+    WITH batch AS (
+        SELECT {COLUMNS} FROM todo
+        WHERE id > :last_id
+        ORDER BY id
+        LIMIT :batch_size
+        FOR SHARE
+    ), copied AS (
+        INSERT INTO todo_partitioned ({COLUMNS})
+        SELECT {COLUMNS} FROM batch
+        ON CONFLICT (user_id, id) DO NOTHING
+    )
+    SELECT max(id), count(*) FROM batch
+    """
+)
+
+
+async def copy_rows(batch_size: int, pause: float, start_id: int = 0) -> int:
+    """Copies all rows with `id > start_id`. Returns the number of rows read."""
+    last_id, total = start_id, 0
+    while True:
+        async with engine.begin() as connection:
+            result = await connection.execute(
+                COPY_BATCH, {"last_id": last_id, "batch_size": batch_size}
+            )
+            max_id, count = result.one()
+        if not count:
+            break
+        last_id, total = max_id, total + count
+        logger.info(f"Copied {total} todo rows, last id {last_id}")
+        await asyncio.sleep(pause)
+    return total
+
+
+async def verify() -> bool:
+    async with engine.connect() as connection:
+        source = await connection.scalar(text("SELECT count(*) FROM todo"))
+        target = await connection.scalar(text("SELECT count(*) FROM todo_partitioned"))
+    logger.info(f"todo: {source} rows, todo_partitioned: {target} rows")
+    return source == target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    copy_parser = subparsers.add_parser("copy", help="copy rows in batches")
+    copy_parser.add_argument("--batch-size", type=int, default=5000)
+    copy_parser.add_argument("--pause", type=float, default=0.05, help="seconds between batches")
+    copy_parser.add_argument("--start-id", type=int, default=0, help="resume after this id")
+    subparsers.add_parser("verify", help="compare row counts")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            if args.command == "copy":
+                await copy_rows(args.batch_size, args.pause, args.start_id)
+            await verify()
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,37 @@
-from app.core.repository import SQLAlchemyRepository
-from app.todo.models import Todo
+from sqlalchemy import select
+
+from app.core.repository import SQLAlchemyRepository, repository_registry
+from app.todo.models import Todo, TodoTombstone
 
 
 class TodoRepository(SQLAlchemyRepository):
-    ...
\ No newline at end of file
+    partition_key = "user_id"
+
+    async def find_changed_since(
+        self, version: int, limit: int, **filter_by
+    ) -> tuple[list[Todo], list[TodoTombstone]]:
+        """
+        Returns todos and tombstones with a version greater than `version`,
+        both ordered by version and limited to `limit` rows each.
+        Served by the `(user_id, version)` indexes.
+        """
+        self._check_partition_key(filter_by)
+        changed = await self.session.execute(
+            self._select()
+            .filter_by(**filter_by)
+            .where(Todo.version > version)
+            .order_by(Todo.version)
+            .limit(limit)
+        )
+        deleted = await self.session.execute(
+            select(TodoTombstone)
+            .execution_options(populate_existing=True)
+            .filter_by(**filter_by)
+            .where(TodoTombstone.version > version)
+            .order_by(TodoTombstone.version)
+            .limit(limit)
+        )
+        return list(changed.scalars().all()), list(deleted.scalars().all())
+
+
+repository_registry.register(Todo, TodoRepository)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional
 
 
@@ -11,6 +11,14 @@ class TodoUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
 
+    @field_validator("title")
+    @classmethod
+    def title_not_null(cls, title: Optional[str]) -> str:
+        # Omitting the title keeps it; an explicit null would violate NOT NULL.
+        if title is None:
+            raise ValueError("title cannot be null")
+        return title
+
 
 class TodoRead(BaseModel):
     id: int
@@ -19,3 +27,10 @@ class TodoRead(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class TodoChanges(BaseModel):
+    version: int
+    has_more: bool
+    items: list[TodoRead]
+    deleted: list[int]
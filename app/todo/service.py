@@ -1,21 +1,48 @@
 
 
-from typing import Annotated, cast
+from typing import Annotated, Sequence, cast
 from fastapi import Depends
+from app.core.change_feed import ChangeFeed
+from app.core.config import settings
+from app.core.entity_cache import EntityCache
 from app.core.exceptions import IncorrectIdException
+from app.core.listing import ListQuery
 from app.core.service import AbstractServiceWithUser
-from app.core.transaction_manager import TManagerDep
+from app.core.transaction_manager import TManagerDep, transactional
+import app.todo.repository  # noqa: F401 (registers TodoRepository)
 from app.todo.models import Todo
-from app.todo.schemas import TodoCreate, TodoRead
+from app.todo.schemas import TodoChanges, TodoCreate, TodoRead
 from app.users.manager import UserManager, get_user_manager
 from app.users.models import User
 
 
+TODO_CHANGES_CHANNEL = "todo_changes"
+
+todo_change_feed = ChangeFeed(TODO_CHANGES_CHANNEL)
+
+todo_cache = (
+    EntityCache("todo", settings.entity_cache_size, settings.entity_cache_ttl)
+    if settings.entity_cache_enabled
+    else None
+)
+todo_count_cache = EntityCache(
+    "todo_count", settings.entity_count_cache_size, settings.entity_count_cache_ttl
+)
+
+
 class TodoService(AbstractServiceWithUser):
-    async def get_all(self, user: User) -> list[TodoRead] | None:
+    entity_cache = todo_cache
+    read_model = TodoRead
+    count_cache = todo_count_cache
+
+    @transactional(read_only=True)
+    async def get_all(self, user: User, query: ListQuery | None = None) -> list[TodoRead] | None:
         async with self.transaction_manager:
-            return await self.repository.find_all(user_id=user.id)
+            if query is None:
+                return await self.repository.find_all(user_id=user.id)
+            return await self.repository.find_page(query, user_id=user.id)
 
+    @transactional(read_only=True)
     async def get_by_id(self, entity_id, user: User) -> TodoRead | None:
         async with self.transaction_manager:
             entity = await self.repository.find_one_or_none(id=entity_id, user_id=user.id)
@@ -23,21 +50,86 @@ class TodoService(AbstractServiceWithUser):
                 raise IncorrectIdException(f"Incorrect {self.entity_type.__name__} id")
             return entity
 
+    @transactional(read_only=True)
+    async def get_many(self, entity_ids: Sequence[int], user: User) -> list[TodoRead]:
+        return await self._get_many(entity_ids, user.id, user_id=user.id)
+
+    @transactional(read_only=True)
+    async def count(self, user: User) -> int:
+        return await self._count("todo", user)
+
+    @transactional()
     async def create(self, entity: TodoCreate, user: User) -> TodoRead:
         async with self.transaction_manager:
             created_entity = await self.repository.insert_data(user_id=user.id, **entity.model_dump())
+            # The id is assigned when the insert is flushed, at the latest before NOTIFY.
+            self.transaction_manager.publish(
+                TODO_CHANGES_CHANNEL, lambda: self._event("create", created_entity.id, user)
+            )
+            self._invalidate_count(user)
             return cast(TodoRead, created_entity)
 
+    @transactional(idempotent=True)
     async def delete(self, entity_id: int, user: User) -> int:
         async with self.transaction_manager:
             deleted_count = await self.repository.delete(id=entity_id, user_id=user.id)
+            if deleted_count:
+                self._publish("delete", entity_id, user)
+                self._invalidate(user.id, entity_id)
+                self._invalidate_count(user)
             return cast(int, deleted_count)
 
+    @transactional(idempotent=True)
     async def update(self, entity_id, user: User, **data) -> int:
         async with self.transaction_manager:
-            updated_count = await self.repository.update_fields_by_id(entity_id, user_id=user.id, **data)
+            updated_count = await self.repository.update_fields_by_id(
+                entity_id, data, user_id=user.id
+            )
+            if updated_count is None:
+                raise IncorrectIdException(f"Incorrect {self.entity_type.__name__} id")
+            if updated_count:
+                self._publish("update", entity_id, user)
+                self._invalidate(user.id, entity_id)
             return cast(int, updated_count)
 
+    @transactional(read_only=True, isolation_level="REPEATABLE READ")
+    async def get_changes(self, user: User, since: int, limit: int) -> TodoChanges:
+        """
+        Returns the user's todos changed and deleted after version `since`.
+
+        Clients pass the returned `version` as `since` of the next call and
+        keep calling while `has_more` is true. A user's versions commit in
+        increasing order, so every change after `since` is either returned
+        now or committed later with a greater version.
+
+        Served by a replica when one is configured: a lagging replica returns
+        an older but consistent state, and the rest comes with the next call.
+        Right after the user's own write the read goes to the primary.
+
+        Todos and tombstones are read in one snapshot (`REPEATABLE READ`): with
+        a snapshot per query, a change committed between the two could be
+        skipped by a `version` taken from the second one.
+        """
+        async with self.transaction_manager:
+            changed, deleted = await self.repository.find_changed_since(
+                since, limit + 1, user_id=user.id
+            )
+        merged = sorted([*changed, *deleted], key=lambda entity: entity.version)
+        page = merged[:limit]
+        return TodoChanges(
+            version=page[-1].version if page else since,
+            has_more=len(merged) > limit,
+            items=[TodoRead.model_validate(entity) for entity in page if isinstance(entity, Todo)],
+            deleted=[entity.id for entity in page if not isinstance(entity, Todo)],
+        )
+
+    @staticmethod
+    def _event(op: str, entity_id: int, user: User) -> dict:
+        return {"op": op, "id": entity_id, "user_id": str(user.id)}
+
+    def _publish(self, op: str, entity_id: int, user: User):
+        self.transaction_manager.publish(TODO_CHANGES_CHANNEL, self._event(op, entity_id, user))
+
     
 def get_todo_service(
     transaction_manager: TManagerDep,
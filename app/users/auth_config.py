@@ -3,18 +3,18 @@ from fastapi_users import  FastAPIUsers
 from fastapi_users.authentication import (
     BearerTransport,
     AuthenticationBackend,
-    JWTStrategy
 )
-from app.core.config import settings
 from app.users.models import User
 from app.users.oauth_config import google_oauth_backend
 from app.users.manager import get_user_manager
+from app.users.token import CachedJWTStrategy, jwt_strategy
 
 
 bearer_transport = BearerTransport(tokenUrl="v1/auth/jwt/login")
 
-def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+def get_jwt_strategy() -> CachedJWTStrategy:
+    # Shared with `google_oauth_backend`: one verified-token cache and revocation list.
+    return jwt_strategy
 
 auth_backend = AuthenticationBackend(
     name="jwt",
@@ -30,3 +30,5 @@ fastapi_users = FastAPIUsers[User, UUID4](
 current_active_user = fastapi_users.current_user(active=True)
 
 current_active_verified_user = fastapi_users.current_user(active=True, verified=True)
+
+current_superuser = fastapi_users.current_user(active=True, superuser=True)
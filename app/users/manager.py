@@ -1,15 +1,20 @@
+from typing import Any
 from pydantic import UUID4
 import smtplib
 from email.mime.text import MIMEText
 
-from fastapi import Depends, HTTPException
-from fastapi_users import BaseUserManager, UUIDIDMixin
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi_users import BaseUserManager, UUIDIDMixin, exceptions, schemas
 from fastapi_users.jwt import generate_jwt
 from fastapi_users_db_sqlalchemy import SQLAlchemyUserDatabase
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert
 
 from app.core.db import get_async_session, AsyncSession
 from app.core.logger import logger
 from app.users.models import User
+from app.users.password import is_usable_password, make_unusable_password, password_hashing_pool
 from app.core.config import settings
 
 
@@ -21,6 +26,102 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, UUID4]):
     reset_password_token_secret = settings.secret
     verification_token_secret = settings.secret
 
+    async def create(
+        self,
+        user_create: schemas.BaseUserCreate,
+        safe: bool = False,
+        request: Request | None = None,
+    ) -> User:
+        """Same as `BaseUserManager.create`, but hashes the password off the event loop."""
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await password_hashing_pool.run(
+            self.password_helper.hash, password
+        )
+
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def get_or_create_oauth_user(
+        self,
+        email: str,
+        username: str,
+        is_verified: bool = False,
+        request: Request | None = None,
+    ) -> User:
+        """
+        Returns the user with `email`, creating it first if it does not exist.
+
+        A single `INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING` both
+        creates and fetches the user, so concurrent first logins cannot race.
+        `xmax = 0` holds only for a freshly inserted row. OAuth users get an
+        unusable password, so nothing is hashed.
+        """
+        statement = insert(User).values(
+            email=email,
+            username=username,
+            hashed_password=make_unusable_password(),
+            is_verified=is_verified,
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={"email": statement.excluded.email},
+        ).returning(User, literal_column("xmax = 0").label("inserted"))
+        session = self.user_db.session
+        user, inserted = (await session.execute(statement)).one()
+        await session.commit()
+        if inserted:
+            await self.on_after_register(user, request)
+        return user
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> User | None:
+        """Same as `BaseUserManager.authenticate`, but verifies the password off the event loop."""
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Run the hasher anyway to mitigate timing attacks
+            await password_hashing_pool.run(self.password_helper.hash, credentials.password)
+            return None
+        if not is_usable_password(user.hashed_password):
+            # OAuth-only user: nothing to verify against, but keep the timing of a failed login.
+            await password_hashing_pool.run(self.password_helper.hash, credentials.password)
+            return None
+
+        verified, updated_password_hash = await password_hashing_pool.run(
+            self.password_helper.verify_and_update,
+            credentials.password,
+            user.hashed_password,
+        )
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+        return user
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        """Hashes a new password off the event loop before the regular update."""
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {
+                key: value for key, value in update_dict.items() if key != "password"
+            }
+            update_dict["hashed_password"] = await password_hashing_pool.run(
+                self.password_helper.hash, password
+            )
+        return await super()._update(user, update_dict)
+
     async def on_after_register(self, user: User, request: None = None):
         logger.info(f"User {user.email} has registered.")
         if not user.is_verified:
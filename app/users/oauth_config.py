@@ -1,7 +1,9 @@
 from authlib.integrations.starlette_client import OAuth
-from fastapi_users.authentication import BearerTransport, AuthenticationBackend, JWTStrategy
+from fastapi_users.authentication import BearerTransport, AuthenticationBackend
 
 from app.core.config import settings
+from app.users.oauth_metadata import ProviderMetadataCache
+from app.users.token import jwt_strategy
 
 
 oauth = OAuth()
@@ -10,13 +12,18 @@ oauth.register(
     name="google",
     client_id=settings.client_id,
     client_secret=settings.client_secret,
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
+    server_metadata_url=settings.google_server_metadata_url,
     client_kwargs={"scope": "openid email profile"},
 )
 
-bearer_transport = BearerTransport(tokenUrl="auth/google/callback")
+google_metadata_cache = ProviderMetadataCache(
+    "google",
+    oauth.google,
+    settings.google_server_metadata_url,
+    ttl=settings.oauth_metadata_ttl,
+)
 
-jwt_strategy = JWTStrategy(secret=settings.secret, lifetime_seconds=3600)
+bearer_transport = BearerTransport(tokenUrl="auth/google/callback")
 
 google_oauth_backend = AuthenticationBackend(
     name="google",
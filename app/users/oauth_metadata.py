@@ -0,0 +1,109 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.db import async_session_maker
+from app.core.logger import logger
+from app.core.models import Base
+
+
+class OAuthProviderMetadata(Base):
+    __tablename__ = "oauth_provider_metadata"
+
+    provider = Column(String(64), primary_key=True)
+    discovery = Column(JSONB, nullable=False)
+    jwks = Column(JSONB, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class ProviderMetadataCache:
+    """
+    Keeps the OpenID discovery document and JWKS of an OAuth provider warm.
+
+    Both documents are persisted in `oauth_provider_metadata`, loaded at startup
+    and installed into the authlib client, so logins never wait for the
+    provider. They are re-fetched in the background every `ttl` seconds; if the
+    provider is unreachable the previous copy stays in use. Authlib still
+    re-fetches the JWKS by itself when a token is signed with an unknown key.
+    """
+
+    RETRY_INTERVAL = 60.0
+
+    def __init__(self, provider: str, client, metadata_url: str, ttl: float, timeout: float = 5.0):
+        self.provider = provider
+        self.client = client
+        self.metadata_url = metadata_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.fetched_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    def _install(self, discovery: dict, jwks: dict, fetched_at: float):
+        # `_loaded_at` tells authlib the metadata is loaded and must not be fetched again.
+        self.client.server_metadata.update({**discovery, "jwks": jwks, "_loaded_at": fetched_at})
+        self.fetched_at = fetched_at
+
+    async def load(self) -> bool:
+        """Installs the persisted copy. Returns False if there is none or it is stale."""
+        async with async_session_maker() as session:
+            record = await session.get(OAuthProviderMetadata, self.provider)
+        if record is None:
+            return False
+        self._install(record.discovery, record.jwks, record.fetched_at.timestamp())
+        return time.time() - self.fetched_at < self.ttl
+
+    async def refresh(self):
+        async with httpx.AsyncClient(timeout=self.timeout) as http:
+            response = await http.get(self.metadata_url)
+            response.raise_for_status()
+            discovery = response.json()
+            response = await http.get(discovery["jwks_uri"])
+            response.raise_for_status()
+            jwks = response.json()
+        fetched_at = datetime.now(timezone.utc)
+        values = {"discovery": discovery, "jwks": jwks, "fetched_at": fetched_at}
+        statement = (
+            insert(OAuthProviderMetadata)
+            .values(provider=self.provider, **values)
+            .on_conflict_do_update(index_elements=[OAuthProviderMetadata.provider], set_=values)
+        )
+        async with async_session_maker() as session:
+            await session.execute(statement)
+            await session.commit()
+        self._install(discovery, jwks, fetched_at.timestamp())
+        logger.info(f"Refreshed OAuth metadata of '{self.provider}'")
+
+    async def _run(self):
+        try:
+            fresh = await self.load()
+        except (OSError, SQLAlchemyError) as e:
+            logger.error(f"Unable to load cached OAuth metadata of '{self.provider}': {e}")
+            fresh = False
+        while True:
+            if fresh:
+                await asyncio.sleep(max(self.fetched_at + self.ttl - time.time(), 0))
+            try:
+                await self.refresh()
+                fresh = True
+            except (OSError, KeyError, ValueError, httpx.HTTPError, SQLAlchemyError) as e:
+                logger.error(f"Unable to refresh OAuth metadata of '{self.provider}': {e}")
+                fresh = False
+                await asyncio.sleep(self.RETRY_INTERVAL)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
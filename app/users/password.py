@@ -0,0 +1,92 @@
+import asyncio
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+R = TypeVar("R")
+
+# Stored instead of a hash for users that sign in through OAuth only; no password matches it.
+UNUSABLE_PASSWORD_PREFIX = "!"
+
+
+def make_unusable_password() -> str:
+    return UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(32)
+
+
+def is_usable_password(hashed_password: str) -> bool:
+    return not hashed_password.startswith(UNUSABLE_PASSWORD_PREFIX)
+
+
+class PasswordHashingPool:
+    """
+    Bounded thread pool for password hashing and verification.
+
+    Argon2 and bcrypt release the GIL while hashing, so running them in worker
+    threads keeps the event loop responsive during login or registration
+    bursts. At most `max_queue` calls may wait for a free worker; beyond that
+    the request is rejected with `503` instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.running = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self.pending - self.running, 0)
+
+    async def run(self, func: Callable[..., R], *args) -> R:
+        if self.queue_depth >= self.max_queue:
+            metrics.inc("password_hash.rejected")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервер перегружен, повторите попытку позже",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, wait, duration = await loop.run_in_executor(
+                self._executor, self._call, time.perf_counter(), func, *args
+            )
+        finally:
+            self.pending -= 1
+        metrics.observe("password_hash.wait_seconds", wait)
+        metrics.observe("password_hash.duration_seconds", duration)
+        return result
+
+    def _call(
+        self, submitted_at: float, func: Callable[..., R], *args
+    ) -> tuple[R, float, float]:
+        started_at = time.perf_counter()
+        with self._lock:
+            self.running += 1
+        try:
+            result = func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+        return result, started_at - submitted_at, time.perf_counter() - started_at
+
+
+password_hashing_pool = PasswordHashingPool(
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
+
+metrics.gauge("password_hash.queue_depth", lambda: password_hashing_pool.queue_depth)
+metrics.gauge("password_hash.in_flight", lambda: password_hashing_pool.running)
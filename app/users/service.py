@@ -1,29 +1,20 @@
 from authlib.integrations.starlette_client import OAuth
 from fastapi import HTTPException, Request
 from fastapi_users.authentication import Strategy
-from fastapi_users.exceptions import UserNotExists
 from app.users.auth_config import auth_backend
 from app.users.manager import UserManager
-from app.users.schemas import UserCreate
+from app.users.models import User
 
 
 async def get_or_create_user(
     user_info: dict, user_manager: UserManager, is_verified: bool = False
-) -> UserCreate:
+) -> User:
     """Search for or create a user."""
-    email = user_info.get("email")
-    username = user_info.get("name")
-    try:
-        user = await user_manager.get_by_email(email)
-    except UserNotExists:
-        user_create = UserCreate(
-            email=email,
-            username=username,
-            password="oauth_default_password",
-            is_verified=is_verified,
-        )
-        user = await user_manager.create(user_create)
-    return user
+    return await user_manager.get_or_create_oauth_user(
+        email=user_info.get("email"),
+        username=user_info.get("name"),
+        is_verified=is_verified,
+    )
 
 
 async def generate_access_token(user) -> str:
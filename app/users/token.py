@@ -0,0 +1,237 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import jwt
+from fastapi_users import exceptions, models
+from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
+from fastapi_users.manager import BaseUserManager
+from sqlalchemy import Column, DateTime, String, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.core.db import async_session_maker
+from app.core.logger import logger
+from app.core.metrics import metrics
+from app.core.models import Base
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_token"
+
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+
+def token_id(token: str, claims: dict[str, Any]) -> str:
+    """The `jti` claim; tokens issued before it existed are identified by their digest."""
+    return claims.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of token digests to verified claims.
+
+    An entry is valid until the `exp` of its token, so a hit skips the signature
+    check without ever extending a token's lifetime. Keys are digests of the
+    whole token including its signature, so a forged token never hits.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=20).digest()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, token: str, claims: dict[str, Any], expires_at: float):
+        digest = self._digest(token)
+        self._entries[digest] = (expires_at, claims)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str):
+        self._entries.pop(self._digest(token), None)
+
+
+class RevocationList:
+    """
+    In-memory set of revoked token ids, mirrored from the `revoked_token` table.
+
+    Checking a token is a set lookup; the table is only read by a background
+    task that fetches rows revoked since the previous refresh. A token revoked
+    on another worker is therefore rejected here after at most
+    `token_revocation_refresh_interval` seconds; on the revoking worker at once.
+    """
+
+    # Rows committed late with an earlier `revoked_at` are picked up by re-reading this window.
+    OVERLAP = timedelta(seconds=30)
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._revoked: dict[str, float] = {}
+        self._watermark: datetime | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    async def revoke(self, jti: str, expires_at: float):
+        self._revoked[jti] = expires_at
+        statement = (
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=datetime.fromtimestamp(expires_at, timezone.utc))
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        )
+        async with async_session_maker() as session:
+            await session.execute(statement)
+            await session.commit()
+
+    async def refresh(self):
+        now = datetime.now(timezone.utc)
+        statement = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(
+            RevokedToken.expires_at > now
+        )
+        if self._watermark is not None:
+            statement = statement.where(RevokedToken.revoked_at > self._watermark - self.OVERLAP)
+        async with async_session_maker() as session:
+            rows = (await session.execute(statement)).all()
+            if self._watermark is None:
+                await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                await session.commit()
+        for jti, expires_at, revoked_at in rows:
+            self._revoked[jti] = expires_at.timestamp()
+            if self._watermark is None or revoked_at > self._watermark:
+                self._watermark = revoked_at
+        if self._watermark is None:
+            self._watermark = now
+        self._purge()
+
+    def _purge(self):
+        now = time.time()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except (OSError, SQLAlchemyError) as e:
+                logger.error(f"Unable to refresh revoked tokens: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+
+class CachedJWTStrategy(JWTStrategy):
+    """
+    `JWTStrategy` that caches verified tokens and supports revocation (logout).
+
+    Tokens get a random `jti`. `read_token` serves claims from
+    `VerifiedTokenCache` and rejects tokens whose id is in the `RevocationList`,
+    neither of which touches the database; `destroy_token` revokes the token.
+    """
+
+    def __init__(
+        self,
+        *args,
+        cache: VerifiedTokenCache,
+        revocations: RevocationList,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+        self.revocations = revocations
+
+    def verify(self, token: str) -> dict[str, Any] | None:
+        claims = self.cache.get(token)
+        if claims is None:
+            try:
+                claims = decode_jwt(
+                    token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+                )
+            except jwt.PyJWTError:
+                return None
+            expires_at = claims.get("exp", time.time() + settings.token_cache_max_age)
+            self.cache.put(token, claims, expires_at)
+        if self.revocations.is_revoked(token_id(token, claims)):
+            return None
+        return claims
+
+    async def read_token(
+        self, token: str | None, user_manager: BaseUserManager[models.UP, models.ID]
+    ) -> models.UP | None:
+        if token is None:
+            return None
+        claims = self.verify(token)
+        if claims is None or claims.get("sub") is None:
+            return None
+        try:
+            parsed_id = user_manager.parse_id(claims["sub"])
+            return await user_manager.get(parsed_id)
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+
+    async def write_token(self, user: models.UP) -> str:
+        data = {"sub": str(user.id), "aud": self.token_audience, "jti": uuid.uuid4().hex}
+        return generate_jwt(data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm)
+
+    async def destroy_token(self, token: str, user: models.UP) -> None:
+        claims = self.verify(token)
+        if claims is None:
+            return
+        expires_at = claims.get("exp", time.time() + settings.token_cache_max_age)
+        await self.revocations.revoke(token_id(token, claims), expires_at)
+        self.cache.discard(token)
+
+
+token_cache = VerifiedTokenCache(settings.token_cache_size)
+revocation_list = RevocationList(settings.token_revocation_refresh_interval)
+
+jwt_strategy = CachedJWTStrategy(
+    secret=settings.secret,
+    lifetime_seconds=3600,
+    cache=token_cache,
+    revocations=revocation_list,
+)
+
+metrics.gauge("auth.token_cache.hits", lambda: token_cache.hits)
+metrics.gauge("auth.token_cache.misses", lambda: token_cache.misses)
+metrics.gauge("auth.revoked_tokens", lambda: len(revocation_list))
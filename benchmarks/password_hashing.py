@@ -0,0 +1,123 @@
+"""
+Latency of `GET /v1/todos/` while password hashes are computed concurrently.
+
+Compares hashing directly on the event loop (what `BaseUserManager` does) with
+hashing in `PasswordHashingPool`. The todo requests go through the whole
+application (middlewares including admission control, routing, the service,
+the transaction manager and the repository) via `httpx.ASGITransport`; only
+the database session is replaced by one that waits `DB_ROUND_TRIP` seconds
+per statement. Run from the project root:
+
+    SECRET=benchmark python -m benchmarks.password_hashing
+"""
+import asyncio
+import statistics
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+from fastapi_users.password import PasswordHelper
+
+from app.core.logger import logger
+from app.core.transaction_manager import TransactionManager
+from app.main import app
+from app.todo.models import Todo
+from app.todo.service import TodoService, get_todo_service
+from app.users.auth_config import current_active_user
+from app.users.password import PasswordHashingPool
+
+
+LOGINS = 16
+PROBES = 200
+TODOS = 20
+DB_ROUND_TRIP = 0.001
+password_helper = PasswordHelper()
+user = SimpleNamespace(id=uuid.uuid4(), is_active=True)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Stands in for `AsyncSession`: every statement costs one database round trip."""
+
+    rows = [
+        Todo(id=i, title=f"todo {i}", description=None, user_id=user.id, version=i)
+        for i in range(TODOS)
+    ]
+
+    async def execute(self, statement, params=None):
+        await asyncio.sleep(DB_ROUND_TRIP)
+        return FakeResult(self.rows)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeTransactionManager(TransactionManager):
+    def _open_session(self):
+        return FakeSession()
+
+
+async def inline_login(hashed: str):
+    password_helper.verify_and_update("password", hashed)
+    await asyncio.sleep(0)
+
+
+async def pooled_login(pool: PasswordHashingPool, hashed: str):
+    await pool.run(password_helper.verify_and_update, "password", hashed)
+
+
+async def todo_probe(client: httpx.AsyncClient, latencies: list[float]):
+    for _ in range(PROBES):
+        started = time.perf_counter()
+        response = await client.get("/v1/todos/")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def measure(client: httpx.AsyncClient, login_factory) -> list[float]:
+    latencies: list[float] = []
+    await asyncio.gather(todo_probe(client, latencies), *(login_factory() for _ in range(LOGINS)))
+    return latencies
+
+
+def report(name: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"{name:>8}: p50 {p50:8.3f} ms  p99 {p99:8.3f} ms  max {latencies[-1] * 1000:8.3f} ms")
+
+
+async def main():
+    logger.disable("app")
+    app.dependency_overrides[current_active_user] = lambda: user
+    app.dependency_overrides[get_todo_service] = lambda: TodoService(
+        Todo, FakeTransactionManager(None), None
+    )
+    hashed = password_helper.hash("password")
+    pool = PasswordHashingPool(workers=2, max_queue=LOGINS)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        report("idle", await measure(client, lambda: asyncio.sleep(0)))
+        report("inline", await measure(client, lambda: inline_login(hashed)))
+        report("pooled", await measure(client, lambda: pooled_login(pool, hashed)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Per-request overhead of a global `SessionMiddleware` on bearer-token API calls.
+
+Calls a trivial ASGI endpoint directly (no server, no HTTP client) with a
+browser-like session cookie, once behind a global `SessionMiddleware` and once
+behind `PathScopedMiddleware` limiting it to the OAuth prefix. Run from the
+project root:
+
+    python -m benchmarks.session_middleware
+"""
+import asyncio
+import json
+import time
+from base64 import b64encode
+
+from itsdangerous import TimestampSigner
+from starlette.middleware.sessions import SessionMiddleware
+
+from app.core.scoped_middleware import PathScopedMiddleware
+
+
+SECRET = "benchmark-secret"
+REQUESTS = 20_000
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"2")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def session_cookie() -> bytes:
+    # What authlib leaves behind after a Google login: the OAuth state in the session.
+    data = {"_state_google_abc": {"data": {"redirect_uri": "http://localhost/cb", "nonce": "n" * 20}}}
+    signed = TimestampSigner(SECRET).sign(b64encode(json.dumps(data).encode()))
+    return b"session=" + signed
+
+
+async def measure(app) -> float:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/v1/todos/",
+        "headers": [(b"authorization", b"Bearer token"), (b"cookie", session_cookie())],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(100):
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / REQUESTS * 1_000_000
+
+
+async def main():
+    baseline = await measure(endpoint)
+    global_session = await measure(SessionMiddleware(endpoint, secret_key=SECRET))
+    scoped_session = await measure(
+        PathScopedMiddleware(
+            endpoint,
+            middleware=SessionMiddleware,
+            prefixes=["/v1/auth/google"],
+            secret_key=SECRET,
+        )
+    )
+    print(f"{'no middleware':>16}: {baseline:6.1f} us/request")
+    print(f"{'global session':>16}: {global_session:6.1f} us/request")
+    print(f"{'scoped session':>16}: {scoped_session:6.1f} us/request")
+    print(f"saved per API request: {global_session - scoped_session:.1f} us")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
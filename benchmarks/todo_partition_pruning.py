@@ -0,0 +1,61 @@
+"""
+Pruned vs. unpruned lookups on the partitioned `todo` table.
+
+Requires a database migrated to head with some data. Prints how many
+partitions each plan touches and the mean execution time reported by
+EXPLAIN ANALYZE. Run from the project root:
+
+    python -m benchmarks.todo_partition_pruning --runs 50
+"""
+import argparse
+import asyncio
+import statistics
+
+from sqlalchemy import text
+
+from app.core.db import engine
+
+
+QUERIES = {
+    "pruned (user_id, id)": "SELECT * FROM todo WHERE user_id = :user_id AND id = :id",
+    "unpruned (id)": "SELECT * FROM todo WHERE id = :id",
+    "pruned list (user_id)": "SELECT * FROM todo WHERE user_id = :user_id",
+}
+
+
+def scanned_relations(plan: dict) -> set[str]:
+    relations = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", ()):
+        relations |= scanned_relations(child)
+    return relations
+
+
+async def main(runs: int):
+    async with engine.connect() as connection:
+        sample = (
+            await connection.execute(text("SELECT id, user_id FROM todo ORDER BY random() LIMIT 1"))
+        ).one_or_none()
+        if sample is None:
+            print("The todo table is empty")
+            return
+        params = {"id": sample.id, "user_id": sample.user_id}
+        for name, query in QUERIES.items():
+            timings, relations = [], set()
+            for _ in range(runs):
+                result = await connection.execute(
+                    text(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}"), params
+                )
+                explained = result.scalar_one()[0]
+                timings.append(explained["Execution Time"])
+                relations = scanned_relations(explained["Plan"])
+            print(
+                f"{name:>22}: {len(relations):2d} partitions, "
+                f"mean {statistics.mean(timings):.3f} ms, p50 {statistics.median(timings):.3f} ms"
+            )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=50)
+    asyncio.run(main(parser.parse_args().runs))
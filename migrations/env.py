@@ -10,7 +10,11 @@ from app.users.models import Base
 
 from app.core.config import settings
 from app.users.models import User
-from app.todo.models import Todo
+from app.todo.models import Todo, TodoTombstone
+from app.core.idempotency import IdempotencyRecord
+from app.core.counters import EntityCount
+from app.users.token import RevokedToken
+from app.users.oauth_metadata import OAuthProviderMetadata
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
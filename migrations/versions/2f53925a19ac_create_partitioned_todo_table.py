@@ -0,0 +1,85 @@
+"""create partitioned todo table
+
+Creates `todo_partitioned`, hash partitioned by `user_id`, and a trigger
+mirroring every write on `todo` into it. Existing rows are copied online with
+`python -m app.todo.partitioning copy`, then revision fcd46b7cf48b swaps
+the tables.
+
+Revision ID: 2f53925a19ac
+Revises: a73b02960884
+Create Date: 2026-10-19 11:05:52.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f53925a19ac'
+down_revision: Union[str, None] = 'a73b02960884'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE todo_partitioned (
+            id integer NOT NULL DEFAULT nextval('todo_id_seq'),
+            title varchar NOT NULL,
+            description varchar,
+            user_id uuid NOT NULL REFERENCES "user" (id),
+            version bigint NOT NULL DEFAULT nextval('todo_version_seq'),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT todo_partitioned_pkey PRIMARY KEY (user_id, id)
+        ) PARTITION BY HASH (user_id)
+        """
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE todo_p{remainder:02d} PARTITION OF todo_partitioned "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+    op.execute("CREATE INDEX ix_todo_partitioned_id ON todo_partitioned (id)")
+    op.execute(
+        "CREATE INDEX ix_todo_partitioned_user_id_version "
+        "ON todo_partitioned (user_id, version)"
+    )
+    op.execute(
+        """
+        CREATE FUNCTION todo_partition_mirror() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM todo_partitioned WHERE user_id = OLD.user_id AND id = OLD.id;
+                RETURN OLD;
+            END IF;
+            IF TG_OP = 'UPDATE' THEN
+                IF OLD.user_id <> NEW.user_id THEN
+                    DELETE FROM todo_partitioned WHERE user_id = OLD.user_id AND id = OLD.id;
+                END IF;
+            END IF;
+            INSERT INTO todo_partitioned (id, title, description, user_id, version, updated_at)
+            VALUES (NEW.id, NEW.title, NEW.description, NEW.user_id, NEW.version, NEW.updated_at)
+            ON CONFLICT (user_id, id) DO UPDATE
+            SET title = EXCLUDED.title,
+                description = EXCLUDED.description,
+                version = EXCLUDED.version,
+                updated_at = EXCLUDED.updated_at;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER todo_partition_mirror AFTER INSERT OR UPDATE OR DELETE ON todo "
+        "FOR EACH ROW EXECUTE FUNCTION todo_partition_mirror()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS todo_partition_mirror ON todo")
+    op.execute("DROP FUNCTION IF EXISTS todo_partition_mirror()")
+    op.execute("DROP TABLE todo_partitioned")
@@ -0,0 +1,42 @@
+"""add todo user_id title index
+
+Serves title prefix filters and title ordered keyset pages of the todo list.
+The index is created on the partitioned parent only, built concurrently on
+every partition and attached, so writes are not blocked while it builds.
+
+Revision ID: 3b8d6f1e2c94
+Revises: 9e4b7f2c1a63
+Create Date: 2026-10-19 16:02:37.518224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d6f1e2c94'
+down_revision: Union[str, None] = '9e4b7f2c1a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+COLUMNS = '(user_id, title COLLATE "C", id)'
+
+
+def upgrade() -> None:
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_todo_user_id_title ON ONLY todo {COLUMNS}")
+    with op.get_context().autocommit_block():
+        for remainder in range(PARTITIONS):
+            partition = f"todo_p{remainder:02d}"
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_user_id_title_idx "
+                f"ON {partition} {COLUMNS}"
+            )
+            op.execute(
+                f"ALTER INDEX ix_todo_user_id_title ATTACH PARTITION {partition}_user_id_title_idx"
+            )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_todo_user_id_title")
@@ -0,0 +1,77 @@
+"""create entity count table
+
+Per-user todo counts maintained by statement-level triggers on `todo`, and
+backfilled while the triggers' lock keeps writers out.
+
+Revision ID: 7c2e9a4d5f18
+Revises: 3b8d6f1e2c94
+Create Date: 2026-10-19 16:48:12.903517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9a4d5f18'
+down_revision: Union[str, None] = '3b8d6f1e2c94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('entity_count',
+    sa.Column('entity', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('count', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('entity', 'user_id')
+    )
+    # Counters are upserted in user_id order, so concurrent statements cannot deadlock.
+    op.execute(
+        """
+        CREATE FUNCTION entity_count_insert() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO entity_count (entity, user_id, count)
+            SELECT TG_ARGV[0], user_id, count(*) FROM new_rows GROUP BY user_id ORDER BY user_id
+            ON CONFLICT (entity, user_id) DO UPDATE SET count = entity_count.count + EXCLUDED.count;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION entity_count_delete() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO entity_count (entity, user_id, count)
+            SELECT TG_ARGV[0], user_id, -count(*) FROM old_rows GROUP BY user_id ORDER BY user_id
+            ON CONFLICT (entity, user_id) DO UPDATE SET count = entity_count.count + EXCLUDED.count;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER todo_count_insert AFTER INSERT ON todo "
+        "REFERENCING NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION entity_count_insert('todo')"
+    )
+    op.execute(
+        "CREATE TRIGGER todo_count_delete AFTER DELETE ON todo "
+        "REFERENCING OLD TABLE AS old_rows "
+        "FOR EACH STATEMENT EXECUTE FUNCTION entity_count_delete('todo')"
+    )
+    op.execute(
+        "INSERT INTO entity_count (entity, user_id, count) "
+        "SELECT 'todo', user_id, count(*) FROM todo GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER todo_count_delete ON todo")
+    op.execute("DROP TRIGGER todo_count_insert ON todo")
+    op.execute("DROP FUNCTION entity_count_delete()")
+    op.execute("DROP FUNCTION entity_count_insert()")
+    op.drop_table('entity_count')
@@ -0,0 +1,33 @@
+"""create oauth provider metadata table
+
+Revision ID: 9e4b7f2c1a63
+Revises: 5d1c3e8a9b27
+Create Date: 2026-10-19 15:21:44.102386
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4b7f2c1a63'
+down_revision: Union[str, None] = '5d1c3e8a9b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('oauth_provider_metadata',
+    sa.Column('provider', sa.String(length=64), nullable=False),
+    sa.Column('discovery', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('jwks', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('fetched_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('provider')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('oauth_provider_metadata')
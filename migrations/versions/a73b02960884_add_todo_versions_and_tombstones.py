@@ -0,0 +1,61 @@
+"""add todo versions and tombstones
+
+Revision ID: a73b02960884
+Revises: c68608eb17fa
+Create Date: 2026-10-19 10:41:07.552310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a73b02960884'
+down_revision: Union[str, None] = 'c68608eb17fa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('todo_version_seq')))
+    op.add_column('todo', sa.Column('version', sa.BigInteger(), server_default=sa.text("nextval('todo_version_seq')"), nullable=False))
+    op.add_column('todo', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.create_index('ix_todo_user_id_version', 'todo', ['user_id', 'version'], unique=False)
+    op.create_table('todo_tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_todo_tombstone_user_id_version', 'todo_tombstone', ['user_id', 'version'], unique=False)
+    op.execute(
+        """
+        CREATE FUNCTION todo_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO todo_tombstone (id, user_id, version)
+            VALUES (OLD.id, OLD.user_id, nextval('todo_version_seq'))
+            ON CONFLICT (id) DO UPDATE
+            SET version = EXCLUDED.version, deleted_at = now();
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER todo_tombstone AFTER DELETE ON todo "
+        "FOR EACH ROW EXECUTE FUNCTION todo_tombstone()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER todo_tombstone ON todo")
+    op.execute("DROP FUNCTION todo_tombstone()")
+    op.drop_index('ix_todo_tombstone_user_id_version', table_name='todo_tombstone')
+    op.drop_table('todo_tombstone')
+    op.drop_index('ix_todo_user_id_version', table_name='todo')
+    op.drop_column('todo', 'updated_at')
+    op.drop_column('todo', 'version')
+    op.execute(sa.schema.DropSequence(sa.Sequence('todo_version_seq')))
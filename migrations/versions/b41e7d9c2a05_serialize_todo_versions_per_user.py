@@ -0,0 +1,77 @@
+"""serialize todo versions per user
+
+Versions are taken by triggers that first lock the owner with a
+transaction-scoped advisory lock, held until commit. A user's writes are
+therefore serialized and their versions become visible in the order they
+were taken, so a delta sync cursor never skips a version that commits later.
+The column default becomes a placeholder overwritten by the trigger.
+
+Revision ID: b41e7d9c2a05
+Revises: 7c2e9a4d5f18
+Create Date: 2026-10-19 18:02:44.381920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e7d9c2a05'
+down_revision: Union[str, None] = '7c2e9a4d5f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOCK_OWNER = "PERFORM pg_advisory_xact_lock(hashtextextended('todo_version:' || {row}.user_id::text, 0));"
+
+
+def upgrade() -> None:
+    op.execute(
+        f"""
+        CREATE FUNCTION todo_version() RETURNS trigger AS $$
+        BEGIN
+            {LOCK_OWNER.format(row="NEW")}
+            NEW.version := nextval('todo_version_seq');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION todo_tombstone() RETURNS trigger AS $$
+        BEGIN
+            {LOCK_OWNER.format(row="OLD")}
+            INSERT INTO todo_tombstone (id, user_id, version)
+            VALUES (OLD.id, OLD.user_id, nextval('todo_version_seq'))
+            ON CONFLICT (id) DO UPDATE
+            SET version = EXCLUDED.version, deleted_at = now();
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER todo_version BEFORE INSERT OR UPDATE ON todo "
+        "FOR EACH ROW EXECUTE FUNCTION todo_version()"
+    )
+    op.execute("ALTER TABLE todo ALTER COLUMN version SET DEFAULT 0")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE todo ALTER COLUMN version SET DEFAULT nextval('todo_version_seq')")
+    op.execute("DROP TRIGGER todo_version ON todo")
+    op.execute("DROP FUNCTION todo_version()")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION todo_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO todo_tombstone (id, user_id, version)
+            VALUES (OLD.id, OLD.user_id, nextval('todo_version_seq'))
+            ON CONFLICT (id) DO UPDATE
+            SET version = EXCLUDED.version, deleted_at = now();
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
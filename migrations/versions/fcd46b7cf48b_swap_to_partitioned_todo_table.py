@@ -0,0 +1,78 @@
+"""swap to partitioned todo table
+
+Copies whatever the online copy has not copied yet under an exclusive lock
+and renames `todo_partitioned` to `todo`. The old table is kept as
+`todo_unpartitioned` and can be dropped once the new layout is verified.
+The app no longer writes to it, so its foreign key to `user` is dropped:
+otherwise deleting a user who had todos would fail on the stale rows.
+
+Revision ID: fcd46b7cf48b
+Revises: 2f53925a19ac
+Create Date: 2026-10-19 11:07:30.215843
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fcd46b7cf48b'
+down_revision: Union[str, None] = '2f53925a19ac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, title, description, user_id, version, updated_at"
+
+
+def upgrade() -> None:
+    op.execute("LOCK TABLE todo IN ACCESS EXCLUSIVE MODE")
+    op.execute(
+        f"INSERT INTO todo_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM todo "
+        "ON CONFLICT (user_id, id) DO NOTHING"
+    )
+    op.execute("DROP TRIGGER todo_partition_mirror ON todo")
+    op.execute("DROP FUNCTION todo_partition_mirror()")
+    op.execute("DROP TRIGGER todo_tombstone ON todo")
+
+    op.execute("ALTER TABLE todo DROP CONSTRAINT todo_user_id_fkey")
+    op.execute("ALTER TABLE todo RENAME TO todo_unpartitioned")
+    op.execute("ALTER TABLE todo_unpartitioned RENAME CONSTRAINT todo_pkey TO todo_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_todo_id RENAME TO ix_todo_unpartitioned_id")
+    op.execute("ALTER INDEX ix_todo_user_id_version RENAME TO ix_todo_unpartitioned_user_id_version")
+
+    op.execute("ALTER TABLE todo_partitioned RENAME TO todo")
+    op.execute("ALTER TABLE todo RENAME CONSTRAINT todo_partitioned_pkey TO todo_pkey")
+    op.execute("ALTER INDEX ix_todo_partitioned_id RENAME TO ix_todo_id")
+    op.execute("ALTER INDEX ix_todo_partitioned_user_id_version RENAME TO ix_todo_user_id_version")
+    op.execute("ALTER SEQUENCE todo_id_seq OWNED BY todo.id")
+    op.execute(
+        "CREATE TRIGGER todo_tombstone AFTER DELETE ON todo "
+        "FOR EACH ROW EXECUTE FUNCTION todo_tombstone()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE todo IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER todo_tombstone ON todo")
+    op.execute("TRUNCATE todo_unpartitioned")
+    op.execute(f"INSERT INTO todo_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM todo")
+    op.execute(
+        "ALTER TABLE todo_unpartitioned ADD CONSTRAINT todo_user_id_fkey "
+        'FOREIGN KEY (user_id) REFERENCES "user" (id)'
+    )
+
+    op.execute("ALTER TABLE todo RENAME TO todo_partitioned")
+    op.execute("ALTER TABLE todo_partitioned RENAME CONSTRAINT todo_pkey TO todo_partitioned_pkey")
+    op.execute("ALTER INDEX ix_todo_id RENAME TO ix_todo_partitioned_id")
+    op.execute("ALTER INDEX ix_todo_user_id_version RENAME TO ix_todo_partitioned_user_id_version")
+
+    op.execute("ALTER TABLE todo_unpartitioned RENAME TO todo")
+    op.execute("ALTER TABLE todo RENAME CONSTRAINT todo_unpartitioned_pkey TO todo_pkey")
+    op.execute("ALTER INDEX ix_todo_unpartitioned_id RENAME TO ix_todo_id")
+    op.execute("ALTER INDEX ix_todo_unpartitioned_user_id_version RENAME TO ix_todo_user_id_version")
+    op.execute("ALTER SEQUENCE todo_id_seq OWNED BY todo.id")
+    op.execute(
+        "CREATE TRIGGER todo_tombstone AFTER DELETE ON todo "
+        "FOR EACH ROW EXECUTE FUNCTION todo_tombstone()"
+    )
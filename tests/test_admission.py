@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.admission import AdmissionControlMiddleware, RouteGate
+
+
+def test_gate_queues_up_to_max_queue():
+    async def scenario():
+        gate = RouteGate(limit=1, max_queue=1)
+        assert await gate.acquire(1.0)
+        waiter = asyncio.create_task(gate.acquire(1.0))
+        await asyncio.sleep(0)
+        rejected = await gate.acquire(1.0)
+        gate.release()
+        return rejected, await waiter, gate.rejected
+
+    rejected, admitted, rejected_count = asyncio.run(scenario())
+
+    assert rejected is False
+    assert admitted is True
+    assert rejected_count == 1
+
+
+def test_gate_rejects_after_queue_timeout():
+    async def scenario():
+        gate = RouteGate(limit=1, max_queue=1)
+        await gate.acquire(1.0)
+        return await gate.acquire(0.01), gate.queued
+
+    assert asyncio.run(scenario()) == (False, 0)
+
+
+def test_middleware_rejects_requests_over_route_limit():
+    async def scenario():
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def slow(request):
+            started.set()
+            await finish.wait()
+            return PlainTextResponse("ok")
+
+        app = Starlette(routes=[Route("/items/{item_id}", slow)])
+        app.add_middleware(
+            AdmissionControlMiddleware,
+            max_queue=0,
+            route_limits={"/items/{item_id}": 1},
+            exempt_paths=[],
+            retry_after=3,
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.get("/items/1"))
+            await started.wait()
+            second = await client.get("/items/2")
+            finish.set()
+            return (await first), second
+
+    first, second = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert second.status_code == 503
+    assert second.headers["Retry-After"] == "3"
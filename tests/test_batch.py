@@ -0,0 +1,101 @@
+"""
+Integration tests of `POST /v1/batch`. They run against the database
+configured in `.env` with all migrations applied and are skipped without one:
+
+    alembic upgrade head
+    python -m pytest tests
+"""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.db import async_session_maker, engine
+from app.main import app
+from app.todo.models import Todo
+from app.users.auth_config import current_active_user
+from app.users.models import User
+
+
+pytestmark = pytest.mark.skipif(not settings.host, reason="no database configured")
+
+
+@asynccontextmanager
+async def batch_client():
+    """Creates a user and yields a function posting a batch as that user; cleans up afterwards."""
+    user = User(
+        id=uuid.uuid4(),
+        email=f"batch-{uuid.uuid4().hex}@example.com",
+        username=f"batch-{uuid.uuid4().hex}",
+        hashed_password="-",
+        is_active=True,
+        is_verified=True,
+    )
+    async with async_session_maker() as session:
+        session.add(user)
+        await session.commit()
+    app.dependency_overrides[current_active_user] = lambda: user
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def post_batch(operations: list[dict]) -> dict:
+                response = await client.post("/v1/batch", json={"operations": operations})
+                assert response.status_code == 200
+                return response.json()
+
+            yield user, post_batch
+    finally:
+        app.dependency_overrides.pop(current_active_user, None)
+        async with async_session_maker() as session:
+            await session.execute(delete(Todo).where(Todo.user_id == user.id))
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+        await engine.dispose()
+
+
+def test_get_after_create_and_update_returns_updated_todo():
+    async def scenario():
+        async with batch_client() as (_, post_batch):
+            created = await post_batch([{"method": "POST", "path": "/todos/", "body": {"title": "old"}}])
+            todo_id = created["results"][0]["body"]["id"]
+            updated = await post_batch([
+                {"method": "PATCH", "path": f"/todos/{todo_id}", "body": {"title": "x"}},
+                {"method": "GET", "path": f"/todos/{todo_id}"},
+            ])
+            return created, updated
+
+    created, result = asyncio.run(scenario())
+
+    assert created["committed"] is True
+    assert created["results"][0]["status"] == 200
+    assert result["committed"] is True
+    updated, read = result["results"]
+    assert updated["status"] == 200
+    assert read["status"] == 200
+    assert read["body"]["id"] == created["results"][0]["body"]["id"]
+    assert read["body"]["title"] == "x"
+
+
+def test_get_after_update_returns_updated_todo():
+    async def scenario():
+        async with batch_client() as (user, post_batch):
+            async with async_session_maker() as session:
+                todo = Todo(user_id=user.id, title="old")
+                session.add(todo)
+                await session.commit()
+            return await post_batch([
+                {"method": "GET", "path": f"/todos/{todo.id}"},
+                {"method": "PATCH", "path": f"/todos/{todo.id}", "body": {"title": "x"}},
+                {"method": "GET", "path": f"/todos/{todo.id}"},
+            ])
+
+    result = asyncio.run(scenario())
+
+    first, updated, read = result["results"]
+    assert first["body"]["title"] == "old"
+    assert updated["status"] == 200
+    assert read["body"]["title"] == "x"
@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import uuid
+from types import SimpleNamespace
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.core.compression import CompressionMiddleware, available_codecs, negotiate
+from app.main import app
+from app.todo.schemas import TodoRead
+from app.todo.service import get_todo_service
+from app.users.auth_config import current_active_user
+
+
+BODY = "x" * 2048
+
+
+def test_negotiate_prefers_client_weight_then_server_order():
+    codecs = available_codecs()
+
+    assert negotiate("gzip;q=0.5, identity", codecs).name == "gzip"
+    assert negotiate("identity", codecs) is None
+    assert negotiate("gzip;q=0", codecs) is None
+    assert negotiate("*", codecs).name == next(iter(codecs))
+
+
+def compressing_app() -> CompressionMiddleware:
+    async def large(request):
+        return PlainTextResponse(BODY, headers={"ETag": 'W/"tag"'})
+
+    async def small(request):
+        return PlainTextResponse("small")
+
+    async def stream(request):
+        async def chunks():
+            for _ in range(3):
+                yield BODY
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    async def events(request):
+        return PlainTextResponse(BODY, media_type="text/event-stream")
+
+    routes = [
+        Route("/large", large), Route("/small", small), Route("/stream", stream), Route("/events", events)
+    ]
+    return CompressionMiddleware(Starlette(routes=routes), minimum_size=1024)
+
+
+def get_all(
+    paths: list[str], middleware: CompressionMiddleware | None = None
+) -> list[httpx.Response]:
+    async def scenario():
+        transport = httpx.ASGITransport(app=middleware or compressing_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [
+                await client.get(path, headers={"Accept-Encoding": "gzip"}) for path in paths
+            ]
+
+    return asyncio.run(scenario())
+
+
+def test_large_body_is_compressed_and_cached_by_etag():
+    middleware = compressing_app()
+    first, second = get_all(["/large", "/large"], middleware)
+
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.headers["Vary"] == "Accept-Encoding"
+    assert first.text == BODY
+    assert second.text == BODY
+    assert middleware.cache.get('W/"tag"', "gzip") is not None
+
+
+def test_small_body_and_event_stream_are_sent_as_is():
+    small, events = get_all(["/small", "/events"])
+
+    assert "Content-Encoding" not in small.headers
+    assert "Content-Encoding" not in events.headers
+
+
+def test_stream_is_compressed_chunk_by_chunk():
+    (response,) = get_all(["/stream"])
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert response.text == BODY * 3
+
+
+def test_compressed_body_is_valid_gzip():
+    async def scenario():
+        transport = httpx.ASGITransport(app=compressing_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async with client.stream("GET", "/large", headers={"Accept-Encoding": "gzip"}) as response:
+                return b"".join([chunk async for chunk in response.aiter_raw()])
+
+    assert gzip.decompress(asyncio.run(scenario())).decode() == BODY
+
+
+def test_list_route_sends_etag_and_answers_revalidation_with_304():
+    user = SimpleNamespace(id=uuid.uuid4(), is_active=True)
+    todo = TodoRead(id=1, title="todo", description=None)
+
+    async def get_todos(*args, **kwargs):
+        return [todo]
+
+    async def scenario():
+        app.dependency_overrides[current_active_user] = lambda: user
+        app.dependency_overrides[get_todo_service] = lambda: SimpleNamespace(get_all=get_todos)
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                first = await client.get("/v1/todos/")
+                revalidated = await client.get(
+                    "/v1/todos/", headers={"If-None-Match": first.headers["ETag"]}
+                )
+                return first, revalidated
+        finally:
+            app.dependency_overrides.clear()
+
+    first, revalidated = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert first.headers["ETag"].startswith('W/"')
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == first.headers["ETag"]
+    assert revalidated.content == b""
@@ -0,0 +1,60 @@
+import time
+
+from app.core.entity_cache import EntityCache
+
+
+def make_cache(max_entries=10, ttl=60.0) -> EntityCache:
+    return EntityCache("test", max_entries, ttl)
+
+
+def test_put_values_are_served_until_they_expire(monkeypatch):
+    cache = make_cache(ttl=1.0)
+    cache.put_many({"a": 1}, cache.generation)
+
+    assert cache.get_many(["a", "b"]) == {"a": 1}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+    assert cache.get_many(["a"]) == {}
+
+
+def test_invalidated_key_is_a_miss():
+    cache = make_cache()
+    cache.put_many({"a": 1}, cache.generation)
+    cache.invalidate("a")
+
+    assert cache.get_many(["a"]) == {}
+
+
+def test_read_started_before_invalidation_cannot_put_old_value_back():
+    cache = make_cache()
+    generation = cache.generation
+    cache.invalidate("a")
+    cache.put_many({"a": "old"}, generation)
+
+    assert cache.get_many(["a"]) == {}
+
+    cache.put_many({"a": "new"}, cache.generation)
+    assert cache.get_many(["a"]) == {"a": "new"}
+
+
+def test_evicted_marker_still_blocks_older_reads_of_uncached_keys():
+    cache = make_cache(max_entries=2)
+    generation = cache.generation
+    cache.invalidate("a")
+    cache.put_many({"b": 2, "c": 3}, cache.generation)
+    assert "a" not in cache._entries
+
+    cache.put_many({"a": "old", "d": 4}, generation)
+
+    assert cache.get_many(["a", "d"]) == {}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+    cache.put_many({"a": 1, "b": 2}, cache.generation)
+    cache.get_many(["a"])
+    cache.put_many({"c": 3}, cache.generation)
+
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
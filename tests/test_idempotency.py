@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.exceptions import IdempotencyConflictException, IdempotencyKeyReusedException
+from app.core.idempotency import IdempotencyManager, InMemoryIdempotencyStore
+
+
+def make_store(ttl=60.0, max_entries=10, lease=30.0) -> InMemoryIdempotencyStore:
+    return InMemoryIdempotencyStore(ttl, max_entries, lease)
+
+
+def test_completed_response_is_replayed():
+    async def scenario():
+        calls = []
+        manager = IdempotencyManager(make_store())
+
+        async def handler():
+            calls.append(1)
+            return {"id": len(calls)}
+
+        first = await manager.execute("key", "fp", handler)
+        second = await manager.execute("key", "fp", handler)
+        return calls, first, second
+
+    calls, first, second = asyncio.run(scenario())
+
+    assert calls == [1]
+    assert second.body == first.body
+    assert second.headers["Idempotent-Replayed"] == "true"
+
+
+def test_key_reused_with_another_payload_is_rejected():
+    async def scenario():
+        manager = IdempotencyManager(make_store())
+        await manager.execute("key", "fp", lambda: asyncio.sleep(0, {}))
+        await manager.execute("key", "other", lambda: asyncio.sleep(0, {}))
+
+    with pytest.raises(IdempotencyKeyReusedException):
+        asyncio.run(scenario())
+
+
+def test_concurrent_duplicates_run_handler_once():
+    async def scenario():
+        calls = []
+        manager = IdempotencyManager(make_store())
+
+        async def handler():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {}
+
+        await asyncio.gather(*(manager.execute("key", "fp", handler) for _ in range(5)))
+        return calls
+
+    assert asyncio.run(scenario()) == [1]
+
+
+def test_failed_request_releases_key():
+    async def scenario():
+        store = make_store()
+        manager = IdempotencyManager(store)
+
+        async def failing():
+            raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            await manager.execute("key", "fp", failing)
+        return await store.reserve("key", "fp")
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_pending_reservation_of_another_worker_conflicts():
+    async def scenario():
+        store = make_store()
+        await store.reserve("key", "fp")
+        await IdempotencyManager(store).execute("key", "fp", lambda: asyncio.sleep(0, {}))
+
+    with pytest.raises(IdempotencyConflictException):
+        asyncio.run(scenario())
+
+
+def test_pending_reservation_is_not_evicted_by_size():
+    async def scenario():
+        store = make_store(max_entries=2)
+        await store.reserve("pending", "fp")
+        for i in range(5):
+            await store.reserve(f"key-{i}", "fp")
+            await store.save(f"key-{i}", 200, b"{}")
+        return await store.reserve("pending", "fp"), await store.get("pending")
+
+    reserved_again, pending = asyncio.run(scenario())
+
+    assert reserved_again is False
+    assert pending is not None and not pending.completed
+
+
+def test_expired_lease_can_be_reserved_again(monkeypatch):
+    async def scenario():
+        store = make_store(lease=1.0)
+        await store.reserve("key", "fp")
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+        return await store.reserve("key", "fp")
+
+    assert asyncio.run(scenario()) is True
+
+
+def test_saved_response_outlives_lease(monkeypatch):
+    async def scenario():
+        store = make_store(ttl=60.0, lease=1.0)
+        await store.reserve("key", "fp")
+        await store.save("key", 201, b"{}")
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+        return await store.get("key")
+
+    stored = asyncio.run(scenario())
+
+    assert stored is not None and stored.status_code == 201
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import app.main  # noqa: F401 (configures all mappers)
+from app.core.exceptions import InvalidCursorException, UnindexedListingError
+from app.core.listing import Filter, ListQuery, Listing, prefix_upper_bound
+from app.todo.models import Todo
+
+
+def todo_listing(**kwargs) -> Listing:
+    listing = Listing(
+        Todo,
+        filters=[Filter("title_prefix", "title", "prefix"), Filter("id_gt", "id", "gt")],
+        sort=["id", "title"],
+        max_limit=10,
+        **kwargs,
+    )
+    listing.validate(("user_id",))
+    return listing
+
+
+def test_prefix_upper_bound():
+    assert prefix_upper_bound("abc") == "abd"
+    assert prefix_upper_bound("a" + chr(0x10FFFF)) == "b"
+    assert prefix_upper_bound(chr(0x10FFFF)) is None
+
+
+def test_validate_finds_index_and_collation():
+    listing = todo_listing()
+
+    assert listing.collations == {"title": "C", "id": None}
+
+
+def test_unindexed_filter_is_rejected():
+    listing = Listing(Todo, filters=[Filter("description", "description")])
+
+    with pytest.raises(UnindexedListingError):
+        listing.validate(("user_id",))
+
+
+def test_nullable_sort_column_is_rejected():
+    with pytest.raises(ValueError):
+        Listing(Todo, sort=["description"]).validate(("user_id",))
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"filters": [Filter("title", "title", "like")]},
+        {"filters": [Filter("sort", "title")]},
+        {"filters": [Filter("a", "title"), Filter("b", "title")]},
+        {"default_sort": "title"},
+    ],
+)
+def test_invalid_definitions_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        Listing(Todo, **kwargs)
+
+
+def test_page_cursor_round_trips():
+    listing = todo_listing()
+    query = ListQuery(listing, (), "-title", None, 2)
+    rows = [SimpleNamespace(id=i, title=f"todo {i}") for i in (3, 2, 1)]
+
+    page, cursor = query.page(rows)
+
+    assert [row.id for row in page] == [3, 2]
+    assert listing._decode_cursor(cursor, "-title") == ("todo 2", 2)
+    with pytest.raises(InvalidCursorException):
+        listing._decode_cursor(cursor, "title")
+    with pytest.raises(InvalidCursorException):
+        listing._decode_cursor("not-a-cursor", "-title")
+
+
+def test_last_page_has_no_cursor():
+    query = ListQuery(todo_listing(), (), "id", None, 5)
+
+    assert query.page([SimpleNamespace(id=1, title="a")])[1] is None
+
+
+def test_dependency_parses_and_validates_query_parameters():
+    listing = todo_listing()
+    api = FastAPI()
+
+    @api.get("/items")
+    def items(query: ListQuery = Depends(listing.dependency())):
+        return {
+            "filters": {item.name: value for item, value in query.filters},
+            "sort": query.sort,
+            "limit": query.limit,
+        }
+
+    client = TestClient(api)
+
+    response = client.get("/items", params={"title_prefix": "ab", "id_gt": "3", "sort": "-title"})
+    assert response.json() == {"filters": {"title_prefix": "ab", "id_gt": 3}, "sort": "-title", "limit": None}
+    assert client.get("/items", params={"sort": "description"}).status_code == 422
+    assert client.get("/items", params={"limit": 11}).status_code == 422
+    assert client.get("/items", params={"id_gt": "x"}).status_code == 422
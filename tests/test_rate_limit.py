@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.routing import APIRoute
+
+from app.core.exceptions import TooManyRequestsException
+from app.core.rate_limit import InMemoryRateLimitBackend, RateLimiter
+from app.main import app
+
+
+def test_bucket_allows_capacity_then_returns_retry_after():
+    async def scenario():
+        backend = InMemoryRateLimitBackend(max_keys=10)
+        return [await backend.consume("key", rate=1.0, capacity=2) for _ in range(3)]
+
+    first, second, third = asyncio.run(scenario())
+
+    assert first == second == 0
+    assert 0 < third <= 1.0
+
+
+def test_bucket_refills_over_time(monkeypatch):
+    async def scenario():
+        backend = InMemoryRateLimitBackend(max_keys=10)
+        await backend.consume("key", rate=1.0, capacity=1)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 1.5)
+        return await backend.consume("key", rate=1.0, capacity=1)
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_backend_keeps_only_most_recent_keys():
+    async def scenario():
+        backend = InMemoryRateLimitBackend(max_keys=2)
+        for key in ("a", "b", "c"):
+            await backend.consume(key, rate=1.0, capacity=5)
+        return list(backend._buckets)
+
+    assert asyncio.run(scenario()) == ["b", "c"]
+
+
+def test_limiter_raises_with_retry_after():
+    limiter = RateLimiter("test", capacity=1, period=10, backend=InMemoryRateLimitBackend(10))
+
+    async def scenario():
+        await limiter.hit("user")
+        await limiter.hit("user")
+
+    with pytest.raises(TooManyRequestsException) as error:
+        asyncio.run(scenario())
+    assert error.value.headers["Retry-After"] == "10"
+
+
+def test_limiter_ignores_requests_without_key():
+    limiter = RateLimiter("test", capacity=1, backend=InMemoryRateLimitBackend(10))
+
+    async def scenario():
+        for _ in range(3):
+            await limiter.hit(None)
+
+    asyncio.run(scenario())
+
+
+def route_limiters(path: str) -> list[RateLimiter]:
+    route = next(r for r in app.routes if isinstance(r, APIRoute) and r.path == path)
+    return [d.call for d in route.dependant.dependencies if isinstance(d.call, RateLimiter)]
+
+
+def test_login_is_limited_but_logout_is_not():
+    assert [limiter.scope for limiter in route_limiters("/v1/auth/jwt/login")] == [
+        "login:ip", "login:user"
+    ]
+    assert route_limiters("/v1/auth/jwt/logout") == []
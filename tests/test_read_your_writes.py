@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.read_your_writes import (
+    LAST_WRITE_COOKIE,
+    LAST_WRITE_HEADER,
+    ReadYourWritesMiddleware,
+    RecentWrites,
+    _parse_timestamp,
+)
+
+
+def test_parse_timestamp():
+    now = time.time()
+
+    assert _parse_timestamp(None) is None
+    assert _parse_timestamp("") is None
+    assert _parse_timestamp("garbage") is None
+    assert _parse_timestamp(f"{now - 1:.6f}") == round(now - 1, 6)
+    # A marker from the future is clamped to now.
+    assert _parse_timestamp(str(now + 3600)) <= time.time()
+
+
+def test_recent_writes_are_remembered_per_principal(monkeypatch):
+    recent = RecentWrites(window=5.0)
+    recent.mark("alice")
+
+    assert recent.is_recent("alice")
+    assert not recent.is_recent("bob")
+    assert not recent.is_recent(None)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert not recent.is_recent("alice")
+
+
+def marker_app(recent: RecentWrites) -> ReadYourWritesMiddleware:
+    async def write(request):
+        recent.mark("alice")
+        return PlainTextResponse("written")
+
+    async def read(request):
+        return PlainTextResponse(str(recent.is_recent("bob")))
+
+    routes = [Route("/write", write, methods=["POST"]), Route("/read", read)]
+    return ReadYourWritesMiddleware(Starlette(routes=routes), window=5.0)
+
+
+def send(recent: RecentWrites, method: str, path: str, **kwargs) -> httpx.Response:
+    async def scenario():
+        transport = httpx.ASGITransport(app=marker_app(recent))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.request(method, path, **kwargs)
+
+    return asyncio.run(scenario())
+
+
+def test_write_sets_marker_header_and_cookie():
+    response = send(RecentWrites(window=5.0), "POST", "/write")
+
+    assert float(response.headers[LAST_WRITE_HEADER]) <= time.time()
+    cookie = response.headers["set-cookie"]
+    assert cookie.startswith(f"{LAST_WRITE_COOKIE}=")
+    assert "Max-Age=5" in cookie and "HttpOnly" in cookie
+
+
+def test_read_without_write_sets_no_marker():
+    response = send(RecentWrites(window=5.0), "GET", "/read")
+
+    assert LAST_WRITE_HEADER not in response.headers
+    assert "set-cookie" not in response.headers
+
+
+def test_marker_from_another_worker_routes_read_to_primary():
+    # A fresh `RecentWrites` stands in for a worker that did not see the write.
+    fresh = f"{time.time():.6f}"
+    stale = f"{time.time() - 60:.6f}"
+
+    assert send(RecentWrites(5.0), "GET", "/read", headers={LAST_WRITE_HEADER: fresh}).text == "True"
+    assert send(RecentWrites(5.0), "GET", "/read", cookies={LAST_WRITE_COOKIE: fresh}).text == "True"
+    assert send(RecentWrites(5.0), "GET", "/read", headers={LAST_WRITE_HEADER: stale}).text == "False"
+    assert send(RecentWrites(5.0), "GET", "/read").text == "False"